@@ -0,0 +1,103 @@
+import os
+import sys
+import timeit
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from indicators import add_indicators
+
+# Micro-benchmark of indicators.add_indicators against the per-page pandas code it replaced.
+# Run from the repository root: python benchmarks/bench_indicators.py
+
+INDICATORS = ['SMA_20', 'SMA_50', 'SMA_200', 'SMA_30', 'EMA_20', 'EMA_50', 'EMA_200', 'EMA_30', 'ATR', 'MACD', 'RSI']
+
+SIZES = [250, 2_000, 20_000, 200_000]
+
+
+def pandas_indicators(df, INDICATORS):
+    # The code the Stock Market, Forex and Commodity pages used to run
+    df = df.copy()
+
+    for INDICATOR in INDICATORS:
+        if "SMA" in INDICATOR:
+            window = int(INDICATOR.split("_")[1])
+            df[INDICATOR] = df['Close'].rolling(window=window, min_periods=1).mean()
+        if "EMA" in INDICATOR:
+            window = int(INDICATOR.split("_")[1])
+            df[INDICATOR] = df['Close'].ewm(span=window, adjust=False, min_periods=1).mean()
+
+    if "ATR" in INDICATORS:
+
+        Prev_Close = df['Close'].shift(1)
+        High_Low = df['High'] - df['Low']
+        High_PrevClose = abs(df['High'] - Prev_Close)
+        Low_PrevClose = abs(df['Low'] - Prev_Close)
+
+        df['TR'] = pd.concat([High_Low, High_PrevClose, Low_PrevClose], axis=1).max(axis=1)
+
+        df['ATR'] = df['TR'].rolling(window=14, min_periods=1).mean()
+
+        df = df.drop(columns=['TR'], axis=1)
+
+    if "MACD" in INDICATORS:
+
+        ema_short = df['Close'].ewm(span=12, adjust=False, min_periods=1).mean()
+        ema_long = df['Close'].ewm(span=26, adjust=False, min_periods=1).mean()
+        df['MACD'] = ema_short - ema_long
+        df['Signal'] = df['MACD'].ewm(span=9, adjust=False, min_periods=1).mean()
+        df['MACD_Hist'] = df['MACD'] - df['Signal']
+
+    if "RSI" in INDICATORS:
+
+        delta = df['Close'].pct_change(periods=1) * 100
+
+        gain = (delta.where(delta > 0, 0)).rolling(window=14, min_periods=1).mean()
+        loss = (-delta.where(delta < 0, 0)).rolling(window=14, min_periods=1).mean()
+
+        rs = gain / loss
+
+        df['RSI'] = 100 - (100 / (1 + rs))
+
+    return df
+
+
+def sample(n, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    spread = np.abs(rng.normal(0, 0.5, n))
+    return pd.DataFrame(
+        {
+            'Open': close + rng.normal(0, 0.2, n),
+            'High': close + spread,
+            'Low': close - spread,
+            'Close': close,
+            'Volume': rng.integers(1_000, 1_000_000, n),
+        },
+        index=pd.date_range("2020-01-01", periods=n, freq="min", tz="America/New_York")
+    )
+
+
+def check(df):
+    expected = pandas_indicators(df, INDICATORS)
+    result = add_indicators(df, INDICATORS)
+    for column in expected.columns:
+        np.testing.assert_allclose(result[column], expected[column], rtol=1e-9, atol=1e-9, err_msg=column)
+
+
+def main():
+    check(sample(5_000))
+
+    print(f"{'bars':>8} {'pandas (ms)':>12} {'numpy (ms)':>12} {'speed-up':>9}")
+    for n in SIZES:
+        df = sample(n)
+        number = max(1, 200_000 // n)
+        old = min(timeit.repeat(lambda: pandas_indicators(df, INDICATORS), number=number, repeat=5)) / number
+        new = min(timeit.repeat(lambda: add_indicators(df, INDICATORS), number=number, repeat=5)) / number
+        print(f"{n:>8} {old * 1e3:>12.3f} {new * 1e3:>12.3f} {old / new:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+import io
+import os
+from abc import ABC, abstractmethod
+import pickle
+import sqlite3
+import threading
+import time
+
+import pandas as pd
+
+# Shared second level for the fetch cache, so replicas behind a load balancer
+# serve each other's upstream results instead of fetching them again.
+# Selected with CACHE_BACKEND, e.g. sqlite:////mnt/shared/fetch_cache.db; without it
+# every process keeps its own in-memory cache only.
+# DataFrames are stored as parquet bytes, anything parquet can't hold is pickled.
+
+
+def serialize(value):
+    if isinstance(value, pd.DataFrame):
+        try:
+            buffer = io.BytesIO()
+            value.to_parquet(buffer)
+            return 'parquet', buffer.getvalue()
+        except Exception:
+            pass
+    return 'pickle', pickle.dumps(value)
+
+
+def deserialize(kind, data):
+    if kind == 'parquet':
+        return pd.read_parquet(io.BytesIO(data))
+    return pickle.loads(data)
+
+
+class CacheBackend(ABC):
+    # Interface of a shared backend; expires is a wall-clock timestamp
+
+    @abstractmethod
+    def get(self, function, key):
+        # (value, expires) or None
+        pass
+
+    @abstractmethod
+    def set(self, function, key, value, expires):
+        pass
+
+    @abstractmethod
+    def delete(self, function, key=None):
+        # One key of a function, or all of them when key is None
+        pass
+
+
+class SQLiteBackend(CacheBackend):
+
+    def __init__(self, path, timeout=5.0):
+        self.path = path
+        self.timeout = timeout
+        self.local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connection() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "function TEXT, key TEXT, kind TEXT, value BLOB, expires REAL, "
+                "PRIMARY KEY (function, key))"
+            )
+
+    def _connection(self):
+        # One connection per thread, sqlite3 connections are not shared between threads
+        connection = getattr(self.local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=self.timeout)
+            self.local.connection = connection
+        return connection
+
+    def get(self, function, key):
+        row = self._connection().execute(
+            "SELECT kind, value, expires FROM entries WHERE function = ? AND key = ? AND expires > ?",
+            (function, key, time.time())
+        ).fetchone()
+        if row is None:
+            return None
+        kind, data, expires = row
+        return deserialize(kind, data), expires
+
+    def set(self, function, key, value, expires):
+        kind, data = serialize(value)
+        with self._connection() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?)",
+                (function, key, kind, data, expires)
+            )
+            connection.execute("DELETE FROM entries WHERE expires <= ?", (time.time(),))
+
+    def delete(self, function, key=None):
+        with self._connection() as connection:
+            if key is None:
+                connection.execute("DELETE FROM entries WHERE function = ?", (function,))
+            else:
+                connection.execute("DELETE FROM entries WHERE function = ? AND key = ?", (function, key))
+
+
+BACKENDS = {
+    'sqlite': SQLiteBackend,
+}
+
+
+def from_url(url):
+    # "<scheme>://<location>", e.g. sqlite:///relative.db or sqlite:////absolute/path.db
+    if not url:
+        return None
+    scheme, _, location = url.partition("://")
+    if scheme not in BACKENDS:
+        raise ValueError(f"Unsupported cache backend: {url}")
+    return BACKENDS[scheme](location[1:] if location.startswith("/") else location)
@@ -0,0 +1,352 @@
+from copy import deepcopy
+from collections import OrderedDict
+import functools
+import inspect
+import os
+import sys
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import pandas as pd
+
+import cache_backend
+import rate_limiter
+
+# In-process cache for the fetch_* functions.
+# Every entry belongs to a data class with its own TTL. An expired entry is still
+# returned straight away while a background thread fetches the new value
+# (stale-while-revalidate), so no page waits on a refetch after expiry.
+# Concurrent misses for the same key share one upstream call (single-flight).
+# All functions share one byte budget, the least recently used entries are evicted
+# once the measured size of everything cached goes over it.
+# With CACHE_BACKEND set, misses are looked up in a backend shared by all replicas
+# before going upstream, and every upstream result is written to it.
+
+TTL = {
+    'intraday': 60,             # 1m ... 90m bars
+    'daily': 15 * 60,           # 1d ... 3mo bars
+    'info': 60 * 60,            # Ticker.info, splits
+    'statements': 24 * 60 * 60, # balance sheet, income statement, cash flow
+}
+
+MAX_BYTES = int(os.environ.get("CACHE_MAX_BYTES", 512 * 1024 ** 2))
+
+_refresh_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="cache-refresh")
+
+shared = cache_backend.from_url(os.environ.get("CACHE_BACKEND"))
+
+
+def sizeof(value):
+    # Real memory held by a cached value, object columns and nested containers included
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, (pd.Series, pd.Index)):
+        return int(value.memory_usage(deep=True))
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(sizeof(k) + sizeof(v) for k, v in value.items())
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return sys.getsizeof(value) + sum(sizeof(v) for v in value)
+    return sys.getsizeof(value)
+
+
+class MemoryBudget:
+    # Byte accounting shared by every CachedFunction, in least recently used order
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict() # (function, key) -> bytes
+        self.bytes = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    def add(self, function, key, nbytes):
+        with self.lock:
+            self.bytes += nbytes - self.entries.pop((function, key), 0)
+            self.entries[(function, key)] = nbytes
+            while self.bytes > self.max_bytes and self.entries:
+                (victim, victim_key), victim_bytes = self.entries.popitem(last=False)
+                self.bytes -= victim_bytes
+                self.evictions += 1
+                victim._evict(victim_key)
+
+    def touch(self, function, key):
+        with self.lock:
+            if (function, key) in self.entries:
+                self.entries.move_to_end((function, key))
+
+    def discard(self, function, key=None):
+        # Forget one key of a function, or all of them when key is None
+        with self.lock:
+            for entry in [e for e in self.entries if e[0] is function and (key is None or e[1] == key)]:
+                self.bytes -= self.entries.pop(entry)
+
+    def usage(self):
+        with self.lock:
+            per_function = dict()
+            for (function, key), nbytes in self.entries.items():
+                per_function[function.__name__] = per_function.get(function.__name__, 0) + nbytes
+            return {
+                'bytes': self.bytes,
+                'max_bytes': self.max_bytes,
+                'entries': len(self.entries),
+                'evictions': self.evictions,
+                'per_function': per_function,
+            }
+
+
+budget = MemoryBudget(MAX_BYTES)
+
+registry = list() # every CachedFunction, for the admin page
+
+
+def history_class(interval="1d", **kwargs):
+    return 'intraday' if interval[-1] in ['m', 'h'] else 'daily'
+
+
+def _freeze(value):
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    return value
+
+
+class CachedFunction:
+
+    def __init__(self, func, data_class, copy=True, on_clear=None):
+        self.func = func
+        self.data_class = data_class
+        self.copy = copy
+        self.on_clear = on_clear
+        self.signature = inspect.signature(func)
+        self.entries = dict()
+        self.refreshing = set()
+        self.inflight = dict()
+        self.hits = 0
+        self.misses = 0
+        self.shared_hits = 0
+        self.calls = 0
+        self.call_time = 0.0
+        self.lock = threading.Lock()
+        functools.update_wrapper(self, func)
+        self.shared_name = f"{self.__module__}.{self.__name__}"
+        registry.append(self)
+
+    def _arguments(self, args, kwargs):
+        bound = self.signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        return bound.arguments
+
+    def _key(self, arguments):
+        return tuple((name, _freeze(value)) for name, value in arguments.items())
+
+    def _class(self, arguments):
+        return self.data_class(**arguments) if callable(self.data_class) else self.data_class
+
+    def _ttl(self, arguments):
+        return TTL[self._class(arguments)]
+
+    def _call(self, arguments):
+        # Upstream call, timed for the statistics
+        start = time.perf_counter()
+        try:
+            return self.func(**arguments)
+        finally:
+            with self.lock:
+                self.calls += 1
+                self.call_time += time.perf_counter() - start
+
+    def _store(self, key, value, ttl, share=True):
+        # Errors are handed back to the caller but never cached
+        if isinstance(value, Exception):
+            return
+        with self.lock:
+            self.entries[key] = (value, time.monotonic() + ttl)
+        budget.add(self, key, sizeof(value))
+        if share and shared is not None:
+            try:
+                shared.set(self.shared_name, repr(key), value, time.time() + ttl)
+            except Exception:
+                pass
+
+    def _unshare(self, key=None):
+        if shared is not None:
+            try:
+                shared.delete(self.shared_name, None if key is None else repr(key))
+            except Exception:
+                pass
+
+    def _load(self, key, arguments, ttl):
+        # A live entry written by any replica saves the upstream call
+        if shared is not None:
+            try:
+                found = shared.get(self.shared_name, repr(key))
+            except Exception:
+                found = None
+            if found is not None:
+                value, expires = found
+                self._store(key, value, expires - time.time(), share=False)
+                with self.lock:
+                    self.shared_hits += 1
+                return value
+
+        value = self._call(arguments)
+        self._store(key, value, ttl)
+        return value
+
+    def _evict(self, key):
+        # Called by the budget, which has already dropped the key from its accounting
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def _refresh(self, key, arguments, ttl):
+        try:
+            with rate_limiter.caller(priority=rate_limiter.BACKGROUND):
+                self._load(key, arguments, ttl)
+        finally:
+            with self.lock:
+                self.refreshing.discard(key)
+
+    def _fetch(self, key, arguments, ttl, flight):
+        # Upstream call made on behalf of every caller waiting on this key
+        try:
+            value = self._load(key, arguments, ttl)
+            flight.set_result(value)
+            return value
+        except BaseException as e:
+            flight.set_exception(e)
+            raise
+        finally:
+            with self.lock:
+                self.inflight.pop(key, None)
+
+    def __call__(self, *args, **kwargs):
+        arguments = self._arguments(args, kwargs)
+        key = self._key(arguments)
+        ttl = self._ttl(arguments)
+
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[1] <= time.monotonic() and key not in self.refreshing:
+                self.refreshing.add(key)
+                _refresh_executor.submit(self._refresh, key, arguments, ttl)
+
+            if entry is not None:
+                self.hits += 1
+            else:
+                self.misses += 1
+                flight = self.inflight.get(key)
+                leader = flight is None
+                if leader:
+                    flight = Future()
+                    self.inflight[key] = flight
+
+        if entry is not None:
+            value = entry[0]
+            budget.touch(self, key)
+        elif leader:
+            value = self._fetch(key, arguments, ttl, flight)
+        else:
+            value = flight.result()
+
+        return deepcopy(value) if self.copy else value
+
+    def prime(self, value, *args, **kwargs):
+        # Store a value fetched elsewhere (e.g. by a batch download) under the key of these arguments
+        arguments = self._arguments(args, kwargs)
+        self._store(self._key(arguments), value, self._ttl(arguments))
+
+    def clear(self, *args, **kwargs):
+        if not args and not kwargs:
+            with self.lock:
+                self.entries.clear()
+            budget.discard(self)
+            self._unshare()
+            if self.on_clear is not None:
+                self.on_clear()
+        else:
+            arguments = self._arguments(args, kwargs)
+            key = self._key(arguments)
+            with self.lock:
+                self.entries.pop(key, None)
+            budget.discard(self, key)
+            self._unshare(key)
+            if self.on_clear is not None:
+                for symbol in _symbols(arguments):
+                    self.on_clear(ticker=symbol, data_class=self._class(arguments))
+
+    def invalidate(self, ticker=None, data_class=None):
+        # Drop the entries for one ticker and/or one data class, returns how many were dropped
+        ticker = ticker.upper() if ticker else None
+        with self.lock:
+            keys = list()
+            for key in self.entries:
+                arguments = dict(key)
+                if data_class is not None and self._class(arguments) != data_class:
+                    continue
+                if ticker is not None and ticker not in _symbols(arguments):
+                    continue
+                keys.append(key)
+            for key in keys:
+                del self.entries[key]
+        for key in keys:
+            budget.discard(self, key)
+            self._unshare(key)
+        if self.on_clear is not None:
+            self.on_clear(ticker=ticker, data_class=data_class)
+        return len(keys)
+
+    def stats(self):
+        with self.lock:
+            requests = self.hits + self.misses
+            return {
+                'function': self.__name__,
+                'hits': self.hits,
+                'misses': self.misses,
+                'shared_hits': self.shared_hits,
+                'hit_ratio': self.hits / requests if requests else None,
+                'entries': len(self.entries),
+                'upstream_calls': self.calls,
+                'mean_latency': self.call_time / self.calls if self.calls else None,
+            }
+
+    def hot_keys(self, n=10):
+        # Most recently used keys first
+        with budget.lock:
+            keys = [key for function, key in reversed(budget.entries) if function is self]
+        return keys[:n]
+
+
+def _symbols(arguments):
+    symbols = set()
+    for name in ['ticker', 'tickers', 'symbols']:
+        value = arguments.get(name)
+        if isinstance(value, str):
+            symbols.add(value.upper())
+        elif isinstance(value, tuple):
+            symbols.update(str(v).upper() for v in value)
+    return symbols
+
+
+def stats():
+    usage = budget.usage()
+    rows = list()
+    for function in registry:
+        row = function.stats()
+        row['bytes'] = usage['per_function'].get(function.__name__, 0)
+        rows.append(row)
+    return rows
+
+
+def invalidate(ticker=None, data_class=None):
+    return sum(function.invalidate(ticker=ticker, data_class=data_class) for function in registry)
+
+
+def cached(data_class, copy=True, on_clear=None):
+    # data_class is a TTL key, or a function of the call arguments returning one.
+    # copy=False hands out the cached object itself, for values the callers never modify.
+    # on_clear(ticker=None, data_class=None) is called on clear() and invalidate() for state kept outside the cache.
+    def decorator(func):
+        return CachedFunction(func, data_class, copy=copy, on_clear=on_clear)
+    return decorator
@@ -0,0 +1,70 @@
+import functools
+import hashlib
+import inspect
+import os
+import pickle
+import threading
+import time
+
+from data_cache import _freeze
+
+# Record/replay transport for the upstream fetch functions.
+# FIXTURE_MODE=record saves every successful upstream result under data/fixtures,
+# FIXTURE_MODE=replay serves them back without touching the network, optionally
+# after FIXTURE_LATENCY seconds, so the pages can be run and profiled offline.
+# Any other value (the default) calls upstream as usual.
+
+MODE = os.environ.get("FIXTURE_MODE", "live")
+LATENCY = float(os.environ.get("FIXTURE_LATENCY", 0))
+FIXTURE_DIR = os.environ.get(
+    "FIXTURE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "fixtures")
+)
+
+
+def _path(name, arguments):
+    key = repr(tuple((arg, _freeze(value)) for arg, value in arguments.items())).encode()
+    return os.path.join(FIXTURE_DIR, name, hashlib.sha1(key).hexdigest() + ".pkl")
+
+
+def _save(path, value):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "wb") as f:
+        pickle.dump(value, f)
+    os.replace(tmp_path, path)
+
+
+def _load(path):
+    with open(path, "rb") as f:
+        return pickle.load(f)
+
+
+def transport(func):
+    # Goes between @cached and the function making the upstream call
+    signature = inspect.signature(func)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if MODE not in ["record", "replay"]:
+            return func(*args, **kwargs)
+
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        path = _path(func.__name__, bound.arguments)
+
+        if MODE == "replay":
+            if LATENCY:
+                time.sleep(LATENCY)
+            try:
+                return _load(path)
+            except (OSError, pickle.UnpicklingError, EOFError):
+                return FileNotFoundError(f"No fixture recorded for {func.__name__}{tuple(bound.arguments.values())}")
+
+        value = func(*args, **kwargs)
+        # Errors are not recorded, a replay of them reports the missing fixture instead
+        if not isinstance(value, Exception):
+            _save(path, value)
+        return value
+
+    return wrapper
@@ -1,32 +1,66 @@
 import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
 import yfinance as yf
+from yfinance.data import YfData
 import pandas as pd
+import numpy as np
 import datetime
-import requests
-import random
-from fp.fp import FreeProxy
+import threading
+import time
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+import history_store
+from sessions import yahoo_session
+from scheduler import scheduler
+from data_cache import cached, history_class, TTL
+import rate_limiter
+from fixtures import transport
+from indicators import IndicatorStream, IndicatorCache, compute, compute_panel, fingerprint, join, moving_average_matrix
+from indicators import crossover_options, crossovers
+from indicators import columns as indicator_columns
 
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import plotly.colors as pc
 
-def get_proxy_dict(probability=0.5):
-    if random.random() < probability:
-        proxy = FreeProxy(rand=True).get()
-        proxies_dict = {
-            "http": proxy
-        }
-        return proxies_dict
-    else:
-        return None
-
-@st.cache_data
+@st.cache_resource
+def start_background_jobs():
+    # Runs once per server process
+    scheduler.start()
+
+def session_id():
+    ctx = get_script_run_ctx(suppress_warning=True)
+    return ctx.session_id if ctx else None
+
+def throttle():
+    # Wait for a token of the shared Yahoo rate limit, charged to the calling browser session
+    rate_limiter.limiter.acquire(session=session_id())
+
+# Fields of Ticker.info the pages read, everything else is dropped before caching
+QUOTE_INFO_FIELDS = (
+    'quoteType', 'shortName', 'currency', 'financialCurrency',
+    'country', 'exchange', 'market', 'sector', 'industry',
+    'marketCap', 'beta', 'beta3Year', 'fundFamily', 'category', 'totalAssets',
+    'currentPrice', 'navPrice', 'previousClose', 'dayHigh', 'dayLow', 'volume',
+    'fiftyTwoWeekLow', 'fiftyTwoWeekHigh',
+)
+
+class QuoteInfo(dict):
+    # Slim projection of Ticker.info, used like the original dict
+    __slots__ = ()
+
+    @classmethod
+    def from_info(cls, info):
+        return cls((field, info[field]) for field in QUOTE_INFO_FIELDS if field in info)
+
+@cached('info')
+@transport
 def fetch_info(ticker):
-    proxy = get_proxy_dict()
-    yf.set_config(proxy=proxy)
-    ticker = yf.Ticker(ticker)
+    ticker = yf.Ticker(ticker, session=yahoo_session)
     try:
-        info = ticker.info
+        throttle()
+        info = QuoteInfo.from_info(ticker.info)
         return info
         # if "quoteType" in ticker.info:
         #     return info
@@ -35,86 +69,429 @@ def fetch_info(ticker):
     except Exception as e:
         return e
 
-@st.cache_data
+QUOTE_SUMMARY_URL = "https://query2.finance.yahoo.com/v10/finance/quoteSummary/"
+
+@cached('info')
+@transport
+def fetch_business_summary(ticker):
+    # Only the profile modules, loaded when the user asks for the summary
+    try:
+        throttle()
+        data = YfData(session=yahoo_session).get_raw_json(
+            QUOTE_SUMMARY_URL + ticker,
+            params={"modules": "assetProfile,summaryProfile"}
+        )
+        for result in data['quoteSummary']['result']:
+            for module in result.values():
+                if module.get('longBusinessSummary'):
+                    return module['longBusinessSummary']
+        return ""
+    except Exception as e:
+        return e
+
+def fetch_info_multiple(tickers, max_workers=8):
+    # Look up every ticker on a bounded thread pool, results keep the input order
+    if len(tickers) == 0:
+        return list()
+
+    # Worker threads have no script context, the lookups are charged to the caller's session
+    session = session_id()
+    def lookup(ticker):
+        with rate_limiter.caller(session=session):
+            return fetch_info(ticker)
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(tickers))) as executor:
+        return list(executor.map(lookup, tickers))
+
+_download_lock = rate_limiter.PriorityLock() # yf.download keeps its results in module globals, warm-up waits for page downloads
+
+def expire_history(ticker=None, data_class=None):
+    # A cleared history must not come straight back from the stored bars either
+    if data_class in [None, 'intraday', 'daily']:
+        history_store.expire(ticker)
+
+@cached(history_class, on_clear=expire_history)
+@transport
 def fetch_history(ticker, period="3mo", interval="1d", start=None):
-    proxy = get_proxy_dict()
-    yf.set_config(proxy=proxy)
-    ticker = yf.Ticker(ticker)
+    symbol = ticker
+    ticker = yf.Ticker(ticker, session=yahoo_session)
+
+    def download(**kwargs):
+        throttle()
+        return ticker.history(interval=interval, **kwargs)
+
     try:
-        if start:
-            hist = ticker.history(
-                start=start,
-                interval=interval
-            )
-        else:
-            hist = ticker.history(
-                period=period,
-                interval=interval
-            )
+        hist = history_store.sync_history(
+            symbol,
+            interval,
+            download,
+            period=period,
+            start=start,
+            max_age=TTL[history_class(interval)]
+        )
 
         return hist
 
     except Exception as e:
         return e
 
-@st.cache_data
-def fetch_balance(ticker, tp="Annual"):
-    ticker = yf.Ticker(ticker)
-    try:
-        if tp == "Annual":
-            bs = ticker.balance_sheet
-        else:
-            bs = ticker.quarterly_balance_sheet
-        return bs.loc[:, bs.isna().mean() < 0.5]
+@cached(history_class, on_clear=expire_history)
+@transport
+def fetch_history_multiple(tickers, period="3mo", interval="1d", start=None):
+    tickers = tuple(tickers)
+    max_age = TTL[history_class(interval)]
 
-    except Exception as e:
-        return e
+    # Fresh stored bars, or a finer interval to resample, need no download. Stored bars missing
+    # only the latest ones are synced per ticker, the remaining tickers share one batch download.
+    hists = dict()
+    missing = list()
+    for ticker in tickers:
+        hist = history_store.stored_history(ticker, interval, period=period, start=start, max_age=max_age)
+        if hist is None and history_store.covered(ticker, interval, period=period, start=start):
+            hist = fetch_history(ticker, period=period, interval=interval, start=start)
+            if isinstance(hist, Exception):
+                return hist
+        if hist is None:
+            missing.append(ticker)
+        elif not hist.empty:
+            hists[ticker] = hist
+
+    if len(missing) > 0:
+        try:
+            throttle()
+            with _download_lock:
+                data = yf.download(
+                    tickers=missing,
+                    period=None if start else period,
+                    start=start,
+                    interval=interval,
+                    group_by='ticker',
+                    actions=True,
+                    auto_adjust=True,
+                    ignore_tz=False,
+                    progress=False,
+                    multi_level_index=True,
+                    session=yahoo_session
+                )
+        except Exception as e:
+            return e
+
+        for ticker in missing:
+            symbol = ticker.upper()
+            if symbol not in data.columns.get_level_values(0):
+                continue
+            hist = data[symbol].dropna(how='all')
+            if hist.empty:
+                continue
+            tz = yf.cache.get_tz_cache().lookup(symbol)
+            if tz:
+                hist.index = hist.index.tz_convert(tz)
+            hist.columns.name = None
+            hists[ticker] = hist
+
+            # Later single-ticker requests are served without another round trip
+            history_store.save_download(ticker, interval, hist, period=period, start=start)
+            fetch_history.prime(hist, ticker, period=period, interval=interval, start=start)
+
+    if len(hists) == 0:
+        return pd.DataFrame()
+
+    panel = pd.concat({ticker: hists[ticker] for ticker in tickers if ticker in hists}, axis=1, names=['Ticker', 'Price'])
+
+    return panel
+
+ACTION_COLUMNS = ['Dividends', 'Stock Splits', 'Capital Gains']
+PRICE_COLUMNS = ['Open', 'High', 'Low', 'Close']
+PRICE_TOLERANCE = 5e-5 # prices are shown with up to 4 decimals
+
+def compact_panel(panel, tickers, labels=None):
+    # Long multi-ticker frame from a fetch_history_multiple panel, with a categorical Ticker column,
+    # float32 prices where they keep 4 decimals, a float32 Pct_change and no all-zero action columns.
+    # labels are the Ticker values shown for each ticker (default: the tickers themselves)
+    labels = tickers if labels is None else labels
+
+    frames = list()
+    for ticker, label in zip(tickers, labels):
+        if ticker not in panel.columns.get_level_values(0):
+            continue
+        hist = panel[ticker].dropna(how='all')
+        if not hist.empty:
+            frames.append((label, hist))
+
+    if len(frames) == 0:
+        return pd.DataFrame(columns=['Ticker'] + PRICE_COLUMNS + ['Pct_change'])
+
+    df = pd.concat([hist for label, hist in frames])
+    df.columns.name = None
+
+    unused = [col for col in ACTION_COLUMNS if col in df.columns and not df[col].fillna(0).any()]
+    df = df.drop(columns=unused)
+
+    for col in PRICE_COLUMNS:
+        if col in df.columns:
+            values = df[col].to_numpy()
+            compact = values.astype('float32')
+            if np.allclose(compact, values, rtol=0, atol=PRICE_TOLERANCE, equal_nan=True):
+                df[col] = compact
+
+    first_close = np.concatenate([np.full(len(hist), hist['Close'].iloc[0]) for label, hist in frames])
+    close = df['Close'].to_numpy(dtype='float64')
+    df['Pct_change'] = ((close - first_close) / first_close).astype('float32')
+
+    categories = remove_duplicates([label for label, hist in frames])
+    ticker = pd.Categorical.from_codes(
+        np.repeat([categories.index(label) for label, hist in frames], [len(hist) for label, hist in frames]),
+        categories=categories
+    )
+    df.insert(0, 'Ticker', ticker)
 
-@st.cache_data
-def fetch_income(ticker, tp="Annual"):
-    ticker = yf.Ticker(ticker)
+    return df
+
+STATEMENTS = {
+    'balance': ('balance_sheet', 'quarterly_balance_sheet'),
+    'income': ('income_stmt', 'quarterly_income_stmt'),
+    'cash': ('cashflow', 'quarterly_cashflow'),
+}
+
+@cached('statements', copy=False)
+@transport
+def fetch_fundamentals(ticker):
+    # All statements, annual and quarterly, cached as one read-only bundle
+    ticker = yf.Ticker(ticker, session=yahoo_session)
     try:
-        if tp == "Annual":
-            ins = ticker.income_stmt
-        else:
-            ins = ticker.quarterly_income_stmt
-        return ins.loc[:, ins.isna().mean() < 0.5]
+        bundle = dict()
+        for statement, (annual, quarterly) in STATEMENTS.items():
+            throttle()
+            bundle[(statement, "Annual")] = getattr(ticker, annual)
+            throttle()
+            bundle[(statement, "Quarterly")] = getattr(ticker, quarterly)
+        return bundle
 
     except Exception as e:
         return e
 
-@st.cache_data
-def fetch_cash(ticker, tp="Annual"):
-    ticker = yf.Ticker(ticker)
-    try:
-        if tp == "Annual":
-            cf = ticker.cashflow
-        else:
-            cf = ticker.quarterly_cashflow
-        return cf.loc[:, cf.isna().mean() < 0.5]
+def fetch_statement(ticker, statement, tp="Annual"):
+    bundle = fetch_fundamentals(ticker)
+    if isinstance(bundle, Exception):
+        return bundle
 
-    except Exception as e:
-        return e
+    df = bundle[(statement, "Annual" if tp == "Annual" else "Quarterly")]
+    return df.loc[:, df.isna().mean() < 0.5].copy()
+
+def fetch_balance(ticker, tp="Annual"):
+    return fetch_statement(ticker, 'balance', tp=tp)
 
-@st.cache_data
+def fetch_income(ticker, tp="Annual"):
+    return fetch_statement(ticker, 'income', tp=tp)
+
+def fetch_cash(ticker, tp="Annual"):
+    return fetch_statement(ticker, 'cash', tp=tp)
+
+@cached('info')
+@transport
 def fetch_splits(ticker):
-    ticker = yf.Ticker(ticker)
+    ticker = yf.Ticker(ticker, session=yahoo_session)
+    throttle()
     return ticker.splits
 
-@st.cache_data
-def fetch_table(url):
-    headers = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64)"}
+QUOTE_URL = "https://query1.finance.yahoo.com/v7/finance/quote"
+
+OVERVIEW_FIELDS = {
+    'symbol': 'Symbol',
+    'shortName': 'Name',
+    'regularMarketPrice': 'Price',
+    'regularMarketChange': 'Change',
+    'regularMarketChangePercent': 'Change %',
+}
+
+def overview_frame(quotes):
+    df = pd.DataFrame(quotes, columns=list(OVERVIEW_FIELDS))
+    df = df.rename(columns=OVERVIEW_FIELDS)
+    df = df.astype({'Symbol': 'string', 'Name': 'string', 'Price': 'float64', 'Change': 'float64', 'Change %': 'float64'})
+    return df
+
+@transport
+def fetch_quotes(symbols):
+    # Compact JSON quotes for a fixed list of symbols, rows keep the order of symbols
     try:
-        proxy = FreeProxy().get()
-        proxies_dict = {
-            "http": proxy
-        }
-        response = requests.get(url, headers=headers, proxies=proxies_dict, timeout=5)
-        df = pd.read_html(response.content)
-        return df[0]
+        throttle()
+        data = YfData(session=yahoo_session).get_raw_json(
+            QUOTE_URL,
+            params={
+                "symbols": ",".join(symbols),
+                "fields": ",".join(OVERVIEW_FIELDS)
+            }
+        )
+        df = overview_frame(data['quoteResponse']['result'])
+        df = df.set_index('Symbol').reindex(list(symbols)).reset_index()
+        return df
+    except Exception as e:
+        return e
+
+@transport
+def fetch_screener(screen, count=6):
+    # Yahoo predefined screens, e.g. day_gainers, day_losers, all_cryptocurrencies_us
+    try:
+        throttle()
+        data = yf.screen(screen, count=count, session=yahoo_session)
+        return overview_frame(data['quotes'])
     except Exception as e:
         return e
 
+# ---- MARKET OVERVIEW ----
+INDICES = ["^GSPC", "^DJI", "^IXIC", "^N225", "^GDAXI", "^MERV"]
+CURRENCIES = ["EURUSD=X", "JPY=X", "GBPUSD=X", "AUDUSD=X", "CNY=X", "MXN=X", "INR=X", "SGD=X", "ZAR=X"]
+COMMODITIES = ["GC=F", "SI=F", "HG=F", "NG=F", "BZ=F", "KC=F", "KE=F", "ZS=F"]
+
+OVERVIEWS = {
+    'indices': (fetch_quotes, INDICES),
+    'gainers': (fetch_screener, "day_gainers"),
+    'losers': (fetch_screener, "day_losers"),
+    'currencies': (fetch_quotes, CURRENCIES),
+    'cryptos': (fetch_screener, "all_cryptocurrencies_us"),
+    'commodities': (fetch_quotes, COMMODITIES),
+}
+
+OVERVIEW_REFRESH = 60 # seconds
+
+# The scheduler refreshes every overview from upstream into shared snapshots, which are the only cache they have
+for _name, (_fetch, _arg) in OVERVIEWS.items():
+    scheduler.add(_name, functools.partial(_fetch, _arg), OVERVIEW_REFRESH)
+
+def get_overview(name):
+    # Latest snapshot; only a request arriving before the first refresh fetches inline
+    df = scheduler.get(name)
+    if df is None:
+        df = scheduler.run_now(name)
+    return df
+
+# ---- PORTFOLIOS ----
+PORTFOLIOS = {
+    "Magnificent 7": "MSFT, GOOGL, AAPL, AMZN, META, TSLA, NVDA",
+    "Top 5 Shanghai": "600519.SS, 601398.SS, 600036.SS, 601318.SS, 601857.SS",
+    "Top 5 Tokyo": "7203.T, 6758.T, 8306.T, 6861.T, 7974.T",
+    "Top 5 Hong Kong": "0700.HK, 9988.HK, 1299.HK, 3690.HK, 0939.HK",
+    "Top 5 Euronext": "ASML.AS, MC.PA, OR.PA, RMS.PA, TTE.PA",
+    "Top 5 London": "AZN.L, HSBA.L, SHEL.L, ULVR.L, DGE.L",
+    "Top 5 Bombay": "RELIANCE.NS, TCS.NS, HDFCBANK.NS, INFY.NS, ICICIBANK.NS",
+    "Top 5 Toronto": "RY.TO, TD.TO, CNR.TO, ENB.TO, SHOP.TO",
+    "Top 5 Frankfurt": "SAP.DE, SIE.DE, VOW3.DE, ALV.DE, DTE.DE",
+    "Top 5 Australia": "BHP.AX, CBA.AX, CSL.AX, NAB.AX, WBC.AX",
+    "Top 5 Singapore": "D05.SI, O39.SI, U11.SI, Z74.SI, 9CI.SI",
+    "Top 5 São Paulo": "VALE3.SA, PETR4.SA, BBDC4.SA, ABEV3.SA, BBAS3.SA",
+    "Top 5 Buenos Aires": "YPFD.BA, GGAL.BA, BMA.BA, BBAR.BA, PAMP.BA",
+    "Oil&Gas": "CVX, XOM, SHEL, YPFD.BA, VIST, PAMP.BA",
+    "Vehicles": "TSLA, F, GM, VOW3.DE, 7203.T, 1211.HK, RACE",
+}
+
+def portfolio_tickers(portfolio):
+    return [item.strip() for item in PORTFOLIOS[portfolio].split(",") if item.strip() != ""]
+
+WARMUP_REFRESH = 15 * 60 # seconds, the TTL of daily bars
+WARMUP_WORKERS = 4
+
+warmup_progress = {'done': 0, 'total': 0, 'errors': 0, 'started_at': None, 'finished_at': None}
+_warmup_lock = threading.Lock()
+
+def warm_up_portfolios(period="3mo", interval="1d"):
+    # Prefetch what the Stock Market page loads for each portfolio with its default period and interval,
+    # so the first user to pick a portfolio is served from the cache
+    tickers = remove_duplicates([ticker for portfolio in PORTFOLIOS for ticker in portfolio_tickers(portfolio)])
+    tasks = [functools.partial(fetch_info, ticker) for ticker in tickers]
+    tasks += [
+        functools.partial(fetch_history_multiple, portfolio_tickers(portfolio), period=period, interval=interval)
+        for portfolio in PORTFOLIOS
+    ]
+
+    with _warmup_lock:
+        warmup_progress.update(done=0, total=len(tasks), errors=0, started_at=time.time(), finished_at=None)
+
+    def run(task):
+        with rate_limiter.caller(priority=rate_limiter.BACKGROUND):
+            try:
+                value = task()
+            except Exception as e:
+                value = e
+        with _warmup_lock:
+            warmup_progress['done'] += 1
+            warmup_progress['errors'] += isinstance(value, Exception)
+
+    with ThreadPoolExecutor(max_workers=WARMUP_WORKERS, thread_name_prefix="warm-up") as executor:
+        list(executor.map(run, tasks))
+
+    with _warmup_lock:
+        warmup_progress['finished_at'] = time.time()
+        return dict(warmup_progress)
+
+scheduler.add('warm_up', warm_up_portfolios, WARMUP_REFRESH)
+
+MAX_INDICATOR_STREAMS = 4 # per session
+
+indicator_cache = IndicatorCache() # shared by all sessions
+
+SLIDER_WINDOWS = range(10, 201) # SMA_X / EMA_X time span slider
+
+def moving_averages(df, names, symbol, interval):
+    # SMA/EMA columns looked up in per-series matrices holding every window of the slider range
+    values = dict()
+    for kind in ['SMA', 'EMA']:
+        windows = [int(name.split("_")[1]) for name in names if name.split("_")[0] == kind]
+        if len(windows) == 0:
+            continue
+        key = (symbol, interval, kind) + fingerprint(df)
+        matrix = indicator_cache.get(key)
+        if matrix is None:
+            matrix = moving_average_matrix(df, kind, SLIDER_WINDOWS)
+            indicator_cache.put(key, matrix)
+        for window in windows:
+            values[f'{kind}_{window}'] = matrix[window]
+    return pd.DataFrame(values, index=df.index)
+
+def indicator_stream(indicators, symbol, period, interval):
+    streams = st.session_state.setdefault('indicator_streams', dict())
+    key = (symbol, period, interval, tuple(indicators))
+    stream = streams.pop(key, None) or IndicatorStream(indicators)
+    streams[key] = stream
+    while len(streams) > MAX_INDICATOR_STREAMS:
+        streams.pop(next(iter(streams)))
+    return stream
+
+def chart_indicators(df, indicators, symbol, period, interval, sliders=()):
+    # Reruns on the same bars (theme or volume toggle, expanders, ...) reuse the columns computed before.
+    # sliders are the indicators set by the SMA_X / EMA_X slider: on daily and longer charts their kind
+    # is taken from one matrix per series holding every window of the slider range, so moving the
+    # slider is a column lookup. Fixed windows are computed and cached on their own.
+    # Intraday charts keep their indicator state in the session between reruns instead,
+    # so new bars only cost the bars that arrived since the previous run
+    if len(indicator_columns(indicators)) == 0 or df.empty:
+        return df
+
+    intraday = history_class(interval) == 'intraday'
+    averages = list()
+    if not intraday:
+        averages = [
+            name for name in dict.fromkeys(sliders)
+            if name in indicators and int(name.split("_")[1]) in SLIDER_WINDOWS
+        ]
+    others = [name for name in indicators if name not in averages]
+
+    parts = list()
+    if len(averages) > 0:
+        parts.append(moving_averages(df, averages, symbol, interval))
+    if len(indicator_columns(others)) > 0:
+        key = (symbol, interval, tuple(others)) + fingerprint(df)
+        values = indicator_cache.get(key)
+        if values is None:
+            if intraday:
+                values = indicator_stream(others, symbol, period, interval).update(df)
+            else:
+                values = compute(df, others)
+            indicator_cache.put(key, values)
+        parts.append(values)
+
+    values = pd.concat(parts, axis=1)
+    return join(df, values[indicator_columns(indicators)])
+
 def format_value(value):
     # Split the string at the first space
     base_value, change = value.split(' ', 1)
@@ -258,7 +635,28 @@ def plot_candles_stick_bar(df, title="", currency=""):
 
     for col_name in df.columns:
 
-        if 'SMA' in col_name or 'EMA' in col_name:
+        if col_name.startswith('Crossover_'):
+
+            # Every signal of the pair in one trace, placed on the faster moving average
+            fast = col_name.partition('_')[2].split('/')[0]
+            signal = df[col_name].to_numpy()
+            cross = np.flatnonzero(signal)
+            golden = signal[cross] > 0
+
+            fig.add_trace(go.Scatter(x=df.index[cross],
+                                     y=df[fast].to_numpy()[cross],
+                                     mode='markers+text',
+                                     marker=dict(
+                                         symbol=np.where(golden, 'triangle-up', 'triangle-down'),
+                                         color=np.where(golden, 'green', 'red'),
+                                         size=12
+                                     ),
+                                     text=np.where(golden, "Golden cross", "Death cross"),
+                                     textposition=np.where(golden, 'bottom center', 'top center'),
+                                     name=col_name.partition('_')[2]),
+                          row=1, col=1)
+
+        elif 'SMA' in col_name or 'EMA' in col_name:
             fig.add_trace(go.Scatter(x=df.index,
                                      y=df[col_name],
                                      mode='lines',
@@ -269,32 +667,6 @@ def plot_candles_stick_bar(df, title="", currency=""):
                                      name=col_name),
                           row=1, col=1)
 
-        elif 'Crossover' in col_name:
-
-            first_period = col_name.split('_')[1].split('/')[0]
-
-            for i, v in df[col_name].items():
-
-                if v == 1.0:  # Buy signal
-
-                    fig.add_annotation(x=df.index[i], y=df[f'SMA_{first_period}'][i],
-                                       text="Golden cross",
-                                       showarrow=True,
-                                       arrowhead=1,
-                                       arrowsize=1,
-                                       ay=60
-                                       )
-
-                if v == -1.0:  # Sell signal
-
-                    fig.add_annotation(x=df.index[i], y=df[f'SMA_{first_period}'][i],
-                                       text="Death cross",
-                                       showarrow=True,
-                                       arrowhead=1,
-                                       arrowsize=1,
-                                       ay=-60
-                                       )
-
         if col_name == 'Volume':
             row += 1
 
@@ -436,7 +808,7 @@ def plot_candles_stick(df, title="", time_span=None):
 def plot_line_multiple(df, title=""):
     fig = go.Figure()
 
-    dfs = df.groupby('Ticker')
+    dfs = df.groupby('Ticker', observed=True, sort=False)
 
     for df_name, df in dfs:
         fig.add_trace(go.Scatter(x=df.index,
@@ -492,6 +864,108 @@ def plot_line_multiple(df, title=""):
 
     return fig
 
+def indicator_overlay(df, indicator):
+    # Indicator values on a scale shared by every ticker: moving averages as change from the first close,
+    # ATR and MACD as a fraction of the close, RSI as is
+    close = df['Close'].astype('float64')
+    if indicator == 'RSI':
+        return df['RSI']
+    if indicator in ['ATR', 'MACD']:
+        return df[indicator] / close
+    first_close = close.groupby(df['Ticker'].to_numpy()).transform('first')
+    return (df[indicator] - first_close) / first_close
+
+def plot_indicator_multiple(df, indicator, title=""):
+    fig = go.Figure()
+
+    values = df[['Ticker']].assign(Value=indicator_overlay(df, indicator).to_numpy())
+
+    for df_name, df_t in values.groupby('Ticker', observed=True, sort=False):
+        fig.add_trace(go.Scatter(x=df_t.index,
+                                 y=df_t['Value'],
+                                 mode='lines',
+                                 name=f'{df_name}',
+                                 meta=df_name,
+                                 hovertemplate='%{meta}: %{y:.2f}<br><extra></extra>', )
+                      )
+
+    if indicator == 'RSI':
+        fig.add_hline(y=70, line_dash="dash", line_color="red")
+        fig.add_hline(y=30, line_dash="dash", line_color="green")
+        yaxis_title = 'RSI'
+    else:
+        fig.add_hline(y=0, line_dash="dash")
+        yaxis_title = {'ATR': 'ATR / Close', 'MACD': 'MACD / Close'}.get(indicator, 'Percentage change')
+
+    fig.update_layout(
+        title=title,
+        xaxis_title='Date',
+        yaxis_title=yaxis_title,
+        hovermode='x',
+        xaxis=dict(
+            showspikes=True,  # Enable vertical spikes
+            spikemode='across',  # Draw spikes across the entire plot
+            spikesnap='cursor',  # Snap spikes to the cursor position
+            showline=True,  # Show axis line
+            showgrid=True,  # Show grid lines
+            spikecolor='black',  # Custom color for spikes
+            spikethickness=1,  # Custom thickness for spikes
+        ),
+        yaxis=dict(
+            tickformat='' if indicator == 'RSI' else '.1%',
+            showspikes=True,  # Enable horizontal spikes
+            spikemode='across',  # Draw spikes across the entire plot
+            spikesnap='cursor',  # Snap spikes to the cursor position
+            showline=True,  # Show axis line
+            showgrid=True,  # Show grid lines
+            spikecolor='black',  # Custom color for spikes
+            spikethickness=1,  # Custom thickness for spikes
+            side='right'  # Move the y-axis ticks to the right side
+        ),
+        legend=dict(
+            orientation="h",  # Horizontal legend
+            yanchor="top",  # Aligns the legend vertically to the top
+            y=-0.3,  # Positions the legend below the subplots
+            xanchor="center",  # Aligns the legend horizontally to the center
+            x=0.5  # Centers the legend horizontally
+        ),
+        showlegend=True,
+        height=500
+    )
+
+    return fig
+
+def indicator_summary(df):
+    # Latest indicator state of every ticker in a long multi-ticker frame with indicator columns
+    last = df.groupby('Ticker', observed=True, sort=False).tail(1).set_index('Ticker')
+
+    summary = pd.DataFrame(index=last.index)
+    summary['Close'] = last['Close']
+    if 'Pct_change' in last.columns:
+        summary['Change %'] = last['Pct_change'] * 100
+
+    for column in last.columns:
+        if column.split("_")[0] in ['SMA', 'EMA']:
+            summary[f'vs {column}'] = np.where(last['Close'] >= last[column], "Above", "Below")
+
+    if 'ATR' in last.columns:
+        summary['ATR %'] = last['ATR'] / last['Close'] * 100
+
+    if 'RSI' in last.columns:
+        summary['RSI'] = last['RSI']
+        summary['RSI state'] = np.select(
+            [last['RSI'] >= 70, last['RSI'] <= 30],
+            ["Overbought", "Oversold"],
+            default="Neutral"
+        )
+
+    if 'MACD' in last.columns:
+        summary['MACD'] = last['MACD']
+        summary['Signal'] = last['Signal']
+        summary['MACD state'] = np.where(last['MACD_Hist'] >= 0, "Bullish", "Bearish")
+
+    return summary.reset_index()
+
 def plot_balance(df, ticker="", currency=""):
     df.columns = pd.to_datetime(df.columns).strftime('%b %d, %Y')
 
@@ -1095,8 +1569,12 @@ def format_number(val):
 def performance_table(df, tickers):
     perform = {}
 
+    groups = df.groupby('Ticker', observed=True, sort=False)
+
     for ticker in tickers:
-        df_t = df[df['Ticker'] == ticker]
+        if ticker not in groups.groups:
+            continue
+        df_t = groups.get_group(ticker)
         LEN = len(df_t)
         Pct_change_1P = (df_t['Close'].iloc[-1] - df_t['Close'].iloc[0]) / df_t['Close'].iloc[0]
         Pct_change_12P = (df_t['Close'].iloc[-1] - df_t['Close'].iloc[int(LEN / 2)]) / df_t['Close'].iloc[int(LEN / 2)]
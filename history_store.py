@@ -0,0 +1,310 @@
+import os
+import threading
+import urllib.parse
+import pandas as pd
+
+# Local OHLCV store: one parquet file per (symbol, interval) under data/history.
+# The first row the file is known to be complete from is kept in the frame attrs,
+# so later requests only have to download the bars after the last stored one.
+# Requests for a coarser interval can also be answered by resampling a finer one.
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "history")
+
+TRADING_DAY_PERIODS = {"1d": 1, "5d": 5}
+
+# Finer intervals each interval can be resampled from, coarsest first
+SOURCE_INTERVALS = {
+    "2m": ["1m"],
+    "5m": ["1m"],
+    "15m": ["5m", "1m"],
+    "30m": ["15m", "5m", "1m"],
+    "60m": ["30m", "15m", "5m", "2m", "1m"],
+    "90m": ["30m", "15m", "5m", "2m", "1m"],
+    "1h": ["30m", "15m", "5m", "2m", "1m"],
+    "1wk": ["1d"],
+    "1mo": ["1d"],
+}
+
+RESAMPLE_RULES = {
+    "2m": "2min", "5m": "5min", "15m": "15min", "30m": "30min", "60m": "60min", "90m": "90min", "1h": "60min",
+    "1wk": "W-MON", "1mo": "MS",
+}
+
+# How far back Yahoo serves intraday bars, older start dates are refused
+INTRADAY_LOOKBACK = {
+    "1m": pd.Timedelta(days=7),
+    "2m": pd.Timedelta(days=60),
+    "5m": pd.Timedelta(days=60),
+    "15m": pd.Timedelta(days=60),
+    "30m": pd.Timedelta(days=60),
+    "60m": pd.Timedelta(days=730),
+    "90m": pd.Timedelta(days=60),
+    "1h": pd.Timedelta(days=730),
+}
+
+AGGREGATIONS = {
+    'Open': 'first',
+    'High': 'max',
+    'Low': 'min',
+    'Close': 'last',
+    'Volume': 'sum',
+    'Dividends': 'sum',
+    'Stock Splits': 'max',
+    'Capital Gains': 'sum',
+}
+
+_lock = threading.Lock()
+
+_expired = dict() # symbol, or None for every symbol -> last explicit expiry
+
+
+def _path(symbol, interval):
+    return os.path.join(DATA_DIR, interval, urllib.parse.quote(symbol, safe="") + ".parquet")
+
+
+def read(symbol, interval):
+    path = _path(symbol, interval)
+    if not os.path.exists(path):
+        return None
+    try:
+        return pd.read_parquet(path)
+    except Exception:
+        return None
+
+
+def write(symbol, interval, hist, covers_from):
+    path = _path(symbol, interval)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    df = hist.copy()
+    df.attrs = {'covers_from': covers_from, 'synced_at': pd.Timestamp.now(tz="UTC").isoformat()}
+
+    # Write to a temporary file first so readers never see a half written file
+    tmp_path = f"{path}.{threading.get_ident()}.tmp"
+    df.to_parquet(tmp_path)
+    os.replace(tmp_path, path)
+
+
+def period_start(period, now=None):
+    now = now or pd.Timestamp.now(tz="UTC")
+
+    if period == "max":
+        return None
+    if period == "ytd":
+        return now.normalize().replace(month=1, day=1)
+
+    offsets = {
+        "mo": lambda n: pd.DateOffset(months=n),
+        "y": lambda n: pd.DateOffset(years=n),
+    }
+    for suffix, offset in offsets.items():
+        if period.endswith(suffix) and period[:-len(suffix)].isdigit():
+            return now - offset(int(period[:-len(suffix)]))
+
+    raise ValueError(f"Unsupported period: {period}")
+
+
+def _localize(ts, index):
+    ts = pd.Timestamp(ts)
+    if index.tz is None:
+        return ts.tz_localize(None) if ts.tz is not None else ts
+    if ts.tz is None:
+        return ts.tz_localize(index.tz)
+    return ts.tz_convert(index.tz)
+
+
+def _covers(stored, period, start):
+    covers_from = stored.attrs.get('covers_from')
+    if covers_from is None or stored.empty:
+        return False
+    if covers_from == "max":
+        return True
+    if start is None and period == "max":
+        return False
+
+    covers_from = _localize(covers_from, stored.index)
+
+    if start is None and period in TRADING_DAY_PERIODS:
+        dates = stored.index[stored.index >= covers_from].normalize().unique()
+        return len(dates) >= TRADING_DAY_PERIODS[period]
+
+    requested = start if start is not None else period_start(period)
+    return covers_from <= _localize(requested, stored.index)
+
+
+def expire(symbol=None):
+    # Stored bars synced before now are no longer fresh, e.g. after the user asked for a refresh
+    _expired[symbol.upper() if symbol else None] = pd.Timestamp.now(tz="UTC")
+
+
+def _fresh(stored, symbol, max_age):
+    synced_at = stored.attrs.get('synced_at')
+    if synced_at is None:
+        return False
+    synced_at = pd.Timestamp(synced_at)
+    expired = [_expired.get(key) for key in [None, symbol.upper()]]
+    if any(ts is not None and synced_at <= ts for ts in expired):
+        return False
+    return pd.Timestamp.now(tz="UTC") - synced_at <= pd.Timedelta(seconds=max_age)
+
+
+def resample(hist, interval):
+    rule = RESAMPLE_RULES[interval]
+    agg = {col: how for col, how in AGGREGATIONS.items() if col in hist.columns}
+
+    if interval in ["1wk", "1mo"]:
+        bars = hist.resample(rule, label='left', closed='left').agg(agg)
+        return bars.dropna(subset=['Open'])
+
+    # Intraday bins start at the session open, e.g. 09:30, 10:30, ... for 60m bars in New York
+    minutes = pd.Timedelta(rule).seconds // 60
+    first_bars = hist.groupby(hist.index.normalize()).head(1).index
+    offsets = {(ts.hour * 60 + ts.minute) % minutes for ts in first_bars}
+    if len(offsets) != 1:
+        return None
+
+    # Resample on local wall-clock time so the bins stay on the session open across DST changes
+    tz = hist.index.tz
+    local = hist.tz_localize(None) if tz is not None else hist
+    bars = local.resample(rule, origin='start_day', offset=pd.Timedelta(minutes=offsets.pop())).agg(agg)
+    bars = bars.dropna(subset=['Open'])
+    return bars.tz_localize(tz) if tz is not None else bars
+
+
+def derive_history(symbol, interval, period="3mo", start=None, max_age=0):
+    # Build the bars from a stored finer interval that covers the request, None if there is none
+    for source in SOURCE_INTERVALS.get(interval, []):
+        stored = read(symbol, source)
+        if stored is None or not _covers(stored, period, start) or not _fresh(stored, symbol, max_age):
+            continue
+        hist = resample(_slice(stored, period, start), interval)
+        if hist is not None:
+            hist.attrs = {}
+            return hist
+    return None
+
+
+def _merge(stored, fresh):
+    if stored is None or stored.empty:
+        return fresh
+    if fresh.empty:
+        return stored
+    if stored.index.tz is not None and fresh.index.tz is not None:
+        fresh = fresh.tz_convert(stored.index.tz)
+
+    # Fresh bars replace the stored ones from their first timestamp on (the last stored bar may have been partial)
+    head = stored[stored.index < fresh.index[0]]
+    return pd.concat([head, fresh])
+
+
+def _slice(hist, period, start):
+    if start is not None:
+        return hist[hist.index >= _localize(start, hist.index)]
+    if period == "max":
+        return hist
+    if period in TRADING_DAY_PERIODS:
+        dates = hist.index.normalize().unique()[-TRADING_DAY_PERIODS[period]:]
+        return hist[hist.index.normalize().isin(dates)]
+    return hist[hist.index >= _localize(period_start(period), hist.index)]
+
+
+def _utc(ts):
+    ts = pd.Timestamp(ts)
+    return ts.tz_localize("UTC") if ts.tz is None else ts.tz_convert("UTC")
+
+
+def _covers_from(hist, period, start):
+    if start is not None:
+        # A naive start is in the exchange time zone, as _covers and _slice read it
+        return _utc(_localize(start, hist.index)).isoformat()
+    if period == "max":
+        return "max"
+    if period in TRADING_DAY_PERIODS:
+        return _utc(hist.index[0]).isoformat()
+    return _utc(period_start(period)).isoformat()
+
+
+def save_download(symbol, interval, hist, period="max", start=None):
+    # Merge a frame downloaded with (period, start) into the store
+    if hist.empty:
+        return
+    with _lock:
+        stored = read(symbol, interval)
+        covers_from = _covers_from(hist, period, start)
+        if stored is not None and stored.attrs.get('covers_from') is not None:
+            previous = stored.attrs['covers_from']
+            if previous == "max" or (covers_from != "max" and pd.Timestamp(previous) < pd.Timestamp(covers_from)):
+                covers_from = previous
+        write(symbol, interval, _merge(stored, hist), covers_from)
+
+
+def stored_history(symbol, interval, period="3mo", start=None, max_age=0):
+    # (period, start) from bars synced less than max_age seconds ago, or resampled from a finer interval.
+    # None if they have to be downloaded.
+    stored = read(symbol, interval)
+    if stored is not None and _covers(stored, period, start) and _fresh(stored, symbol, max_age):
+        hist = _slice(stored, period, start)
+        hist.attrs = {}
+        return hist
+    return derive_history(symbol, interval, period=period, start=start, max_age=max_age)
+
+
+def covered(symbol, interval, period="3mo", start=None):
+    # Whether a sync of (period, start) only has to download the bars after the last stored one
+    stored = read(symbol, interval)
+    return stored is not None and _covers(stored, period, start)
+
+
+def sync_history(symbol, interval, download, period="3mo", start=None, max_age=0):
+    # Serve (period, start) from the store, downloading only the bars after the last stored one.
+    # Stored bars synced less than max_age seconds ago, or a finer interval to resample, need no download.
+    # download(**kwargs) wraps Ticker.history for this symbol and interval.
+    hist = stored_history(symbol, interval, period=period, start=start, max_age=max_age)
+    if hist is not None:
+        return hist
+
+    stored = read(symbol, interval)
+    if stored is None or not _covers(stored, period, start):
+        hist = download(start=start) if start is not None else download(period=period)
+        save_download(symbol, interval, hist, period=period, start=start)
+        return hist
+
+    delta = None
+    lookback = INTRADAY_LOOKBACK.get(interval)
+    if lookback is None or pd.Timestamp.now(tz="UTC") - _utc(stored.index[-1]) < lookback:
+        try:
+            delta = download(start=stored.index[-1])
+        except Exception:
+            delta = None
+
+    # The delta starts at the last stored bar, so it is never empty unless Yahoo refused it
+    # (e.g. intraday bars older than it keeps), fall back to a full download
+    if delta is None or delta.empty:
+        hist = download(start=start) if start is not None else download(period=period)
+        if not hist.empty:
+            # The stored bars can't be joined up with the new ones, the file starts over
+            with _lock:
+                write(symbol, interval, hist, _covers_from(hist, period, start))
+        return hist
+
+    actions = [col for col in ['Dividends', 'Stock Splits'] if col in delta.columns and col in stored.columns]
+    known = stored[actions].reindex(delta.index).fillna(0)
+    if ((delta[actions] != 0) & (known == 0)).any().any():
+        # A new dividend or split changes the adjusted prices of every stored bar
+        covers_from = stored.attrs['covers_from']
+        if covers_from == "max":
+            hist = download(period="max")
+        else:
+            hist = download(start=_localize(covers_from, stored.index))
+        with _lock:
+            write(symbol, interval, hist, covers_from)
+        return _slice(hist, period, start)
+
+    hist = _merge(stored, delta)
+    if not delta.empty:
+        with _lock:
+            write(symbol, interval, hist, stored.attrs['covers_from'])
+
+    hist = _slice(hist, period, start)
+    hist.attrs = {}
+    return hist
@@ -0,0 +1,600 @@
+import math
+import threading
+from collections import OrderedDict, deque
+
+import numpy as np
+import pandas as pd
+
+# Technical indicators for the candlestick charts.
+# add_indicators() reads the OHLC columns once into contiguous float64 arrays, fills
+# every requested indicator into one preallocated output block and appends it to the
+# frame in a single step. Results match the pandas rolling/ewm definitions the pages
+# used before (min_periods=1, ewm with adjust=False), NaN bars included.
+# IndicatorStream keeps the same columns up to date bar by bar for live intraday charts,
+# and IndicatorCache keeps computed columns so reruns on unchanged bars skip the work.
+# compute_panel() runs the same code on a bars-by-ticker array for the multi-ticker views.
+# crossovers() marks the golden/death crosses between two moving average columns.
+
+ATR_WINDOW = 14
+RSI_WINDOW = 14
+MACD_FAST = 12
+MACD_SLOW = 26
+MACD_SIGNAL = 9
+
+MIN_DECAY = 1e-100 # smallest weight an EMA block may reach before it is restarted
+
+
+def rolling_mean(values, window, out):
+    # Mean of the non-NaN values among the last `window` ones, NaN when there are none.
+    # 2-D values are windowed along the first axis, column by column
+    valid = ~np.isnan(values)
+    if not valid.any():
+        out[:] = np.nan
+        return out
+
+    # Cumulative sums of values centered on the first one, so long windows keep their precision
+    first = np.argmax(valid, axis=0)
+    reference = values[first] if values.ndim == 1 else values[first, np.arange(values.shape[1])]
+    reference = np.where(np.isnan(reference), 0.0, reference)
+    sums = np.cumsum(np.where(valid, values - reference, 0.0), axis=0)
+    counts = np.cumsum(valid, axis=0, dtype=np.int64)
+    sums[window:] -= sums[:-window].copy()
+    counts[window:] -= counts[:-window].copy()
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        np.divide(sums, counts, out=out)
+    out += reference
+    out[counts == 0] = np.nan
+    return out
+
+
+def _ema_run(values, alpha, start, out):
+    # out[i] = (1 - alpha) * out[i - 1] + alpha * values[i] for a run without NaN, from out[-1] = start.
+    # Solved in closed form block by block: out[j] = d^j * (start + alpha * sum(values[k] / d^k, k <= j)).
+    # 2-D values run along the first axis, start then holds one value per column
+    # and alpha may hold one smoothing factor per column
+    decay = 1 - np.asarray(alpha, dtype=np.float64)
+    n = len(values)
+    if np.all(decay == 0):
+        out[:] = values
+        return
+    block = max(1, min(n, int(math.log(MIN_DECAY) / np.log(decay).min())))
+    powers = decay ** np.arange(1, block + 1).reshape((-1,) + (1,) * decay.ndim)
+    powers = powers.reshape(powers.shape + (1,) * (out.ndim - powers.ndim))
+    i = 0
+    while i < n:
+        j = min(i + block, n)
+        p = powers[:j - i]
+        out[i:j] = p * (start + alpha * np.cumsum(values[i:j] / p, axis=0))
+        start = out[j - 1]
+        i = j
+
+
+def ewm_mean(values, span, out):
+    # Series.ewm(span=span, adjust=False, min_periods=1).mean()
+    alpha = 2 / (span + 1)
+    decay = 1 - alpha
+    valid = ~np.isnan(values)
+    out[:] = np.nan
+    if not valid.any():
+        return out
+
+    # Runs of consecutive valid values, the mean is carried over the NaN gaps between them
+    edges = np.flatnonzero(np.diff(np.concatenate(([False], valid, [False])).astype(np.int8)))
+    starts, ends = edges[::2], edges[1::2]
+
+    weighted = values[starts[0]]
+    previous_end = None
+    for start, end in zip(starts, ends):
+        if previous_end is not None:
+            # pandas lets the old weight decay over the skipped bars too (ignore_na=False)
+            old_weight = decay ** (start - previous_end + 1)
+            out[previous_end:start] = weighted
+            weighted = (old_weight * weighted + alpha * values[start]) / (old_weight + alpha)
+        out[start] = weighted
+        _ema_run(values[start + 1:end], alpha, weighted, out[start + 1:end])
+        weighted = out[end - 1]
+        previous_end = end
+    out[previous_end:] = weighted
+    return out
+
+
+def ewm_mean_packed(values, span, out):
+    # ewm_mean for a bars-by-ticker array, one column per ticker.
+    # Columns without NaN share one scan, the others go through ewm_mean one by one
+    alpha = 2 / (span + 1)
+    gaps = np.isnan(values).any(axis=0)
+    if not gaps.any():
+        out[0] = values[0]
+        _ema_run(values[1:], alpha, values[0], out[1:])
+        return out
+
+    clean = np.flatnonzero(~gaps)
+    if len(clean) > 0:
+        scan = np.empty((len(values), len(clean)))
+        scan[0] = values[0, clean]
+        _ema_run(values[1:, clean], alpha, scan[0].copy(), scan[1:])
+        out[:, clean] = scan
+    for column in np.flatnonzero(gaps):
+        out[:, column] = ewm_mean(np.ascontiguousarray(values[:, column]), span, np.empty(len(values)))
+    return out
+
+
+def moving_average_matrix(df, kind, windows):
+    # SMA or EMA of the Close for every window at once, one column per window
+    close = np.ascontiguousarray(df['Close'].to_numpy(dtype=np.float64))
+    windows = [int(window) for window in windows]
+    out = np.empty((len(close), len(windows)), order='F') # one contiguous column per window
+    valid = ~np.isnan(close)
+
+    if len(close) == 0:
+        pass
+    elif kind == 'SMA':
+        # One cumulative-sum pass, each window is then a difference of two shifted views
+        reference = close[np.argmax(valid)] if valid.any() else 0.0
+        sums = np.cumsum(np.where(valid, close - reference, 0.0))
+        counts = np.cumsum(valid, dtype=np.int64)
+        for j, window in enumerate(windows):
+            column = out[:, j]
+            column[:] = sums
+            column[window:] -= sums[:-window]
+            count = counts.copy()
+            count[window:] -= counts[:-window]
+            with np.errstate(invalid='ignore', divide='ignore'):
+                column /= count
+            column += reference
+            column[count == 0] = np.nan
+    elif valid.all():
+        # Every span in one closed-form scan, one smoothing factor per column
+        alpha = 2 / (np.array(windows) + 1)
+        out[0] = close[0]
+        _ema_run(close[1:, None], alpha, out[0].copy(), out[1:])
+    else:
+        for j, window in enumerate(windows):
+            ewm_mean(close, window, out[:, j])
+
+    return pd.DataFrame(out, index=df.index, columns=windows)
+
+
+def true_range(high, low, close, out):
+    # max(High - Low, |High - previous Close|, |Low - previous Close|), ignoring NaN terms
+    previous = np.empty_like(close)
+    previous[:1] = np.nan # nothing before the first bar, and no first bar in an empty frame
+    previous[1:] = close[:-1]
+    np.subtract(high, low, out=out)
+    np.fmax(out, np.abs(high - previous), out=out)
+    np.fmax(out, np.abs(low - previous), out=out)
+    return out
+
+
+def gains_losses(close):
+    # Percentage change of the forward filled close, split into gains and losses (0 where there is none)
+    closes = pd.DataFrame(close).ffill().to_numpy().reshape(close.shape)
+    delta = np.empty_like(closes)
+    delta[:1] = np.nan
+    with np.errstate(invalid='ignore', divide='ignore'):
+        np.divide(closes[1:], closes[:-1], out=delta[1:])
+    delta -= 1
+    delta *= 100
+    return np.where(delta > 0, delta, 0.0), np.where(delta < 0, -delta, 0.0)
+
+
+def rsi(close, window, out):
+    # Rolling mean of percentage gains over rolling mean of percentage losses
+    gain, loss = gains_losses(close)
+    rolling_mean(gain, window, gain)
+    rolling_mean(loss, window, loss)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        np.divide(gain, loss, out=out)
+    np.add(out, 1, out=out)
+    np.divide(100, out, out=out)
+    np.subtract(100, out, out=out)
+    return out
+
+
+def columns(indicators):
+    # Output columns for the requested indicators, in the order they are added, each name once
+    names = list(dict.fromkeys(name for name in indicators if name.split("_")[0] in ['SMA', 'EMA']))
+    if "ATR" in indicators:
+        names.append('ATR')
+    if "MACD" in indicators:
+        names += ['MACD', 'Signal', 'MACD_Hist']
+    if "RSI" in indicators:
+        names.append('RSI')
+    return names
+
+
+def _fill(block, close, high, low, ewm):
+    # Fill the output arrays in block (column name -> array shaped like close)
+    emas = dict()
+    def ema(span):
+        if span not in emas:
+            target = block.get(f'EMA_{span}')
+            emas[span] = ewm(close, span, target if target is not None else np.empty_like(close))
+        return emas[span]
+
+    for name in block:
+        kind, _, window = name.partition("_")
+        if kind == 'SMA':
+            rolling_mean(close, int(window), block[name])
+        elif kind == 'EMA':
+            ema(int(window))
+
+    if 'ATR' in block:
+        tr = true_range(high, low, close, np.empty_like(close))
+        rolling_mean(tr, ATR_WINDOW, block['ATR'])
+
+    if 'MACD' in block:
+        np.subtract(ema(MACD_FAST), ema(MACD_SLOW), out=block['MACD'])
+        ewm(block['MACD'], MACD_SIGNAL, block['Signal'])
+        np.subtract(block['MACD'], block['Signal'], out=block['MACD_Hist'])
+
+    if 'RSI' in block:
+        rsi(close, RSI_WINDOW, block['RSI'])
+
+
+def compute(df, indicators):
+    # Indicator columns for df as a frame with the same index
+    names = columns(indicators)
+    out = np.empty((len(names), len(df)))
+    block = dict(zip(names, out))
+
+    close = np.ascontiguousarray(df['Close'].to_numpy(dtype=np.float64))
+    high = low = None
+    if 'ATR' in block:
+        high = np.ascontiguousarray(df['High'].to_numpy(dtype=np.float64))
+        low = np.ascontiguousarray(df['Low'].to_numpy(dtype=np.float64))
+
+    _fill(block, close, high, low, ewm_mean)
+
+    return pd.DataFrame(out.T, index=df.index, columns=names)
+
+
+def compute_panel(df, indicators):
+    # Indicator columns for a long multi-ticker frame (Ticker column, see compact_panel), every ticker in one pass.
+    # Each ticker's rows are packed into one column of a bars-by-ticker array, so tickers trading on
+    # different calendars leave no gaps in each other's series; the results match compute() per ticker.
+    names = columns(indicators)
+    codes, tickers = pd.factorize(df['Ticker'])
+
+    counts = np.bincount(codes, minlength=len(tickers))
+    order = np.argsort(codes, kind='stable')
+    position = np.empty(len(codes), dtype=np.int64)
+    position[order] = np.arange(len(codes)) - np.repeat(np.cumsum(counts) - counts, counts)
+    rows = max(counts.max(initial=0), 1)
+    padding = np.arange(rows)[:, None] >= counts
+
+    def packed(column):
+        array = np.empty((rows, len(tickers)))
+        array[position, codes] = df[column].to_numpy(dtype=np.float64)
+        # The padding after a shorter ticker repeats its last row, so it adds no NaN of its own
+        np.copyto(array, array[np.maximum(counts - 1, 0), np.arange(len(tickers))], where=padding)
+        return array
+
+    close = packed('Close')
+    high = low = None
+    if 'ATR' in names:
+        high, low = packed('High'), packed('Low')
+
+    out = np.empty((len(names),) + close.shape)
+    block = dict(zip(names, out))
+    _fill(block, close, high, low, ewm_mean_packed)
+
+    return pd.DataFrame(out[:, position, codes].T, index=df.index, columns=names)
+
+
+def crossover_options(indicators):
+    # Crossover_<fast>/<slow> for every pair of the requested moving averages, shorter window first
+    averages = sorted(
+        dict.fromkeys(name for name in indicators if name.split("_")[0] in ['SMA', 'EMA']),
+        key=lambda name: int(name.split("_")[1])
+    )
+    return [f'Crossover_{fast}/{slow}' for i, fast in enumerate(averages) for slow in averages[i + 1:]]
+
+
+def crossover(fast, slow):
+    # 1 on the bar where fast crosses above slow (golden cross), -1 where it crosses below (death cross), 0 elsewhere.
+    # Bars where the two are equal or missing keep the side of the last bar that had one
+    side = np.sign(fast - slow)
+    side[np.isnan(side)] = 0
+    last = np.where(side != 0, np.arange(len(side)), 0)
+    np.maximum.accumulate(last, out=last)
+    previous = side[last][:-1]
+
+    out = np.zeros(len(side), dtype=np.int8)
+    out[1:] = np.where((side[1:] != 0) & (previous != 0) & (side[1:] != previous), side[1:], 0)
+    return out
+
+
+def crossovers(df, names):
+    # Crossover signal columns (see crossover_options) for the moving average columns of df
+    values = dict()
+    for name in names:
+        fast, slow = name.partition("_")[2].split("/")
+        values[name] = crossover(
+            df[fast].to_numpy(dtype=np.float64),
+            df[slow].to_numpy(dtype=np.float64)
+        )
+    return pd.DataFrame(values, index=df.index, columns=list(names))
+
+
+def join(df, values):
+    # df with the indicator columns in values appended (existing columns of the same name are replaced)
+    return pd.concat([df.drop(columns=values.columns, errors='ignore'), values], axis=1)
+
+
+def add_indicators(df, indicators):
+    if len(columns(indicators)) == 0 or df.empty:
+        return df
+    return join(df, compute(df, indicators))
+
+
+class RollingMean:
+    # rolling_mean for one value at a time: O(1) per push, peek() previews a push without applying it
+
+    def __init__(self, window):
+        self.window = window
+        self.values = deque(maxlen=window)
+        self.sum = 0.0
+        self.count = 0
+        self.pushes = 0
+
+    def seed(self, values):
+        self.values.clear()
+        self.values.extend(values[-self.window:].tolist())
+        self._resum()
+
+    def _resum(self):
+        valid = [v for v in self.values if not math.isnan(v)]
+        self.sum = math.fsum(valid)
+        self.count = len(valid)
+
+    def _step(self, value):
+        total, count = self.sum, self.count
+        if len(self.values) == self.window and not math.isnan(self.values[0]):
+            total -= self.values[0]
+            count -= 1
+        if not math.isnan(value):
+            total += value
+            count += 1
+        return total, count
+
+    def peek(self, value):
+        total, count = self._step(value)
+        return total / count if count else math.nan
+
+    def push(self, value):
+        self.sum, self.count = self._step(value)
+        self.values.append(value)
+        self.pushes += 1
+        if self.pushes % self.window == 0:
+            # Start again from an exact sum so rounding errors don't build up
+            self._resum()
+        return self.sum / self.count if self.count else math.nan
+
+
+class EWMMean:
+    # ewm_mean for one value at a time, following the pandas recursion including NaN gaps
+
+    def __init__(self, span):
+        self.span = span
+        self.alpha = 2 / (span + 1)
+        self.decay = 1 - self.alpha
+        self.weighted = math.nan
+        self.old_weight = 1.0
+
+    def seed(self, values):
+        valid = np.flatnonzero(~np.isnan(values))
+        if len(valid) == 0:
+            self.weighted, self.old_weight = math.nan, 1.0
+            return
+        self.weighted = float(ewm_mean(values, self.span, np.empty(len(values)))[-1])
+        self.old_weight = self.decay ** (len(values) - 1 - valid[-1])
+
+    def _step(self, value):
+        weighted, old_weight = self.weighted, self.old_weight
+        if math.isnan(weighted):
+            return (value, old_weight) if not math.isnan(value) else (weighted, old_weight)
+        old_weight *= self.decay
+        if not math.isnan(value):
+            weighted = (old_weight * weighted + self.alpha * value) / (old_weight + self.alpha)
+            old_weight = 1.0
+        return weighted, old_weight
+
+    def peek(self, value):
+        return self._step(value)[0]
+
+    def push(self, value):
+        self.weighted, self.old_weight = self._step(value)
+        return self.weighted
+
+
+def _ratio(a, b):
+    # a / b with the numpy results for a zero denominator
+    if b == 0:
+        return math.nan if a == 0 or math.isnan(a) else math.copysign(math.inf, a)
+    return a / b
+
+
+class IndicatorStream:
+    # Indicator columns for a frame that grows at the end, e.g. intraday bars refetched on every rerun.
+    # The state covers every bar but the last one, which may still be forming: each update() re-evaluates
+    # that bar and only processes the bars after it, so the cost does not depend on the lookback.
+    # When bars drop off the front (e.g. a 5d window moving on by a day) the state is seeded again,
+    # so the values always match compute() on the same bars.
+
+    def __init__(self, indicators):
+        self.indicators = list(indicators)
+        self.names = columns(indicators)
+        self.spans = sorted({int(name.split("_")[1]) for name in self.names if name.startswith("EMA_")}
+                            | ({MACD_FAST, MACD_SLOW} if 'MACD' in self.names else set()))
+        self.rows = 0
+
+    def seed(self, df):
+        n = len(df)
+        capacity = max(2 * n, 64)
+        self.values = np.empty((capacity, len(self.names)))
+        self.values[:n] = compute(df, self.indicators).to_numpy()
+        self.stamps = np.empty(capacity, dtype=np.int64)
+        self.stamps[:n] = df.index.asi8
+        self.rows = n
+
+        high = df['High'].to_numpy(dtype=np.float64)[:-1]
+        low = df['Low'].to_numpy(dtype=np.float64)[:-1]
+        close = df['Close'].to_numpy(dtype=np.float64)[:-1]
+
+        self.smas = dict()
+        for name in self.names:
+            if name.startswith("SMA_"):
+                self.smas[name] = RollingMean(int(name.split("_")[1]))
+                self.smas[name].seed(close)
+        self.emas = {span: EWMMean(span) for span in self.spans}
+        for state in self.emas.values():
+            state.seed(close)
+        if 'ATR' in self.names:
+            self.atr = RollingMean(ATR_WINDOW)
+            self.atr.seed(true_range(high, low, close, np.empty(len(close))))
+        if 'MACD' in self.names:
+            self.signal = EWMMean(MACD_SIGNAL)
+            macd = ewm_mean(close, MACD_FAST, np.empty(len(close))) - ewm_mean(close, MACD_SLOW, np.empty(len(close)))
+            self.signal.seed(macd)
+        if 'RSI' in self.names:
+            gain, loss = gains_losses(close)
+            self.gain, self.loss = RollingMean(RSI_WINDOW), RollingMean(RSI_WINDOW)
+            self.gain.seed(gain)
+            self.loss.seed(loss)
+
+        filled = pd.Series(close).ffill().to_numpy()
+        self.previous_close = close[-1] if len(close) else math.nan
+        self.previous_filled = filled[-1] if len(filled) else math.nan
+        self.committed_close = self.previous_close
+
+    def _step(self, high, low, close, commit):
+        step = (lambda state, value: state.push(value)) if commit else (lambda state, value: state.peek(value))
+        row = dict()
+
+        for name, state in self.smas.items():
+            row[name] = step(state, close)
+        emas = {span: step(state, close) for span, state in self.emas.items()}
+        for name in self.names:
+            if name.startswith("EMA_"):
+                row[name] = emas[int(name.split("_")[1])]
+
+        if 'ATR' in self.names:
+            terms = [high - low, abs(high - self.previous_close), abs(low - self.previous_close)]
+            terms = [term for term in terms if not math.isnan(term)]
+            row['ATR'] = step(self.atr, max(terms) if terms else math.nan)
+
+        if 'MACD' in self.names:
+            row['MACD'] = emas[MACD_FAST] - emas[MACD_SLOW]
+            row['Signal'] = step(self.signal, row['MACD'])
+            row['MACD_Hist'] = row['MACD'] - row['Signal']
+
+        filled = self.previous_filled if math.isnan(close) else close
+        if 'RSI' in self.names:
+            delta = (_ratio(filled, self.previous_filled) - 1) * 100
+            gain = step(self.gain, delta if delta > 0 else 0.0)
+            loss = step(self.loss, -delta if delta < 0 else 0.0)
+            row['RSI'] = 100 - _ratio(100, 1 + _ratio(gain, loss))
+
+        if commit:
+            self.previous_close = close
+            self.previous_filled = filled
+        return [row[name] for name in self.names]
+
+    def _append(self, stamp, row):
+        if self.rows == len(self.stamps):
+            self.values = np.concatenate([self.values, np.empty_like(self.values)])
+            self.stamps = np.concatenate([self.stamps, np.empty_like(self.stamps)])
+        self.values[self.rows] = row
+        self.stamps[self.rows] = stamp
+        self.rows += 1
+
+    def _extend(self, df):
+        # Process the bars after the last committed one, False when df does not continue the stream
+        if self.rows < 2 or not isinstance(df.index, pd.DatetimeIndex):
+            return False
+        stamps = df.index.asi8
+        committed = self.rows - 2
+        pos = int(np.searchsorted(stamps, self.stamps[committed]))
+        if pos >= len(stamps) or stamps[pos] != self.stamps[committed] or pos != committed:
+            return False
+        if stamps[0] != self.stamps[0]:
+            return False
+        close = df['Close'].iloc[pos]
+        if not (close == self.committed_close or (math.isnan(close) and math.isnan(self.committed_close))):
+            return False
+        if pos + 1 == len(df):
+            return False
+
+        high = df['High'].to_numpy(dtype=np.float64)[pos + 1:]
+        low = df['Low'].to_numpy(dtype=np.float64)[pos + 1:]
+        close = df['Close'].to_numpy(dtype=np.float64)[pos + 1:]
+        stamps = stamps[pos + 1:]
+
+        self.rows -= 1
+        for i in range(len(close) - 1):
+            self._append(stamps[i], self._step(high[i], low[i], close[i], commit=True))
+            self.committed_close = close[i]
+        self._append(stamps[-1], self._step(high[-1], low[-1], close[-1], commit=False))
+        return True
+
+    def update(self, df):
+        # Indicator columns for df, like compute(df, indicators)
+        if df.empty:
+            return compute(df, self.indicators)
+        if not self._extend(df):
+            self.seed(df)
+        values = self.values[self.rows - len(df):self.rows].copy()
+        return pd.DataFrame(values, index=df.index, columns=self.names)
+
+
+def fingerprint(df):
+    # Cheap identity of a bar frame: row count, first and last timestamp, and the last close,
+    # which changes while the last bar is still forming
+    if df.empty:
+        return (0,)
+    return (len(df), df.index[0], df.index[-1], float(df['Close'].iloc[-1]))
+
+
+class IndicatorCache:
+    # Computed indicator columns, evicted least recently used first beyond max_entries or max_bytes
+
+    def __init__(self, max_entries=64, max_bytes=128 * 1024 ** 2):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict() # key -> (values, bytes)
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return entry[0]
+
+    def put(self, key, values):
+        nbytes = int(values.memory_usage(deep=True).sum())
+        with self.lock:
+            previous = self.entries.pop(key, None)
+            if previous is not None:
+                self.bytes -= previous[1]
+            self.entries[key] = (values, nbytes)
+            self.bytes += nbytes
+            while len(self.entries) > self.max_entries or (self.bytes > self.max_bytes and len(self.entries) > 1):
+                self.bytes -= self.entries.popitem(last=False)[1][1]
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.bytes = 0
+
+    def stats(self):
+        with self.lock:
+            return {'entries': len(self.entries), 'bytes': self.bytes, 'hits': self.hits, 'misses': self.misses}
@@ -1,4 +1,6 @@
+import os
 import streamlit as st
+from functions import start_background_jobs
 
 # --- PAGE SETUP ---
 
@@ -27,10 +29,24 @@ page_commodity = st.Page(
     icon=":material/oil_barrel:",
 )
 
-pg = st.navigation(pages=[page_price, page_financials, page_forex, page_commodity])
+pages = [page_price, page_financials, page_forex, page_commodity]
+
+# Cache statistics for operators, only listed when DASHBOARD_ADMIN is set
+if os.environ.get("DASHBOARD_ADMIN"):
+    page_admin = st.Page(
+        "views/Page_admin.py",
+        title="Cache admin",
+        icon=":material/monitoring:",
+    )
+    pages.append(page_admin)
+
+pg = st.navigation(pages=pages)
 
 # --- SHARED ON ALL PAGES ---
 st.logo("imgs/logo_friendly.png", size="large")
 
+# --- BACKGROUND JOBS ---
+start_background_jobs()
+
 # --- RUN NAVIGATION ---
 pg.run()
\ No newline at end of file
@@ -0,0 +1,142 @@
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+
+# Process-wide token bucket for upstream Yahoo calls.
+# Waiting callers are queued by priority class, so interactive requests go ahead of
+# background prefetch and refresh jobs. Within a class every session has its own
+# queue and sessions take turns, so one session with a long ticker list cannot
+# starve the others.
+# PriorityLock applies the same classes to a mutex around a shared upstream resource.
+
+FOREGROUND = 0
+BACKGROUND = 1
+
+PRIORITY_NAMES = {FOREGROUND: 'foreground', BACKGROUND: 'background'}
+
+_local = threading.local()
+
+
+@contextmanager
+def caller(priority=None, session=None):
+    # Default priority and session for the acquire calls made by this thread
+    previous = getattr(_local, 'priority', None), getattr(_local, 'session', None)
+    _local.priority = priority if priority is not None else previous[0]
+    _local.session = session if session is not None else previous[1]
+    try:
+        yield
+    finally:
+        _local.priority, _local.session = previous
+
+
+def current_priority():
+    priority = getattr(_local, 'priority', None)
+    return FOREGROUND if priority is None else priority
+
+
+class RateLimiter:
+
+    def __init__(self, rate=5.0, burst=10, history=256):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.queues = {priority: OrderedDict() for priority in PRIORITY_NAMES}
+        self.waits = deque(maxlen=history)
+        self.cond = threading.Condition()
+
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def _head(self):
+        # First waiter of the first session in the most urgent non-empty class
+        for priority in sorted(self.queues):
+            sessions = self.queues[priority]
+            if sessions:
+                return next(iter(sessions.values()))[0]
+        return None
+
+    def acquire(self, priority=None, session=None):
+        # Block until a token is granted, returns the time spent waiting
+        if priority is None:
+            priority = current_priority()
+        if session is None:
+            session = getattr(_local, 'session', None)
+
+        waiter = object()
+        start = time.monotonic()
+        with self.cond:
+            sessions = self.queues[priority]
+            sessions.setdefault(session, deque()).append(waiter)
+            self.cond.notify_all()
+
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                if self._head() is waiter:
+                    if self.tokens >= 1:
+                        break
+                    self.cond.wait((1 - self.tokens) / self.rate)
+                else:
+                    self.cond.wait()
+
+            self.tokens -= 1
+            # The session goes to the back of the rotation once served
+            queue = sessions.pop(session)
+            queue.popleft()
+            if queue:
+                sessions[session] = queue
+            wait = now - start
+            self.waits.append(wait)
+            self.cond.notify_all()
+        return wait
+
+    def stats(self):
+        with self.cond:
+            self._refill(time.monotonic())
+            waits = list(self.waits)
+            queued = {
+                PRIORITY_NAMES[priority]: sum(len(queue) for queue in sessions.values())
+                for priority, sessions in self.queues.items()
+            }
+            sessions = len({session for sessions in self.queues.values() for session in sessions})
+            tokens = self.tokens
+        return {
+            'queued': queued,
+            'sessions': sessions,
+            'tokens': tokens,
+            'mean_wait': sum(waits) / len(waits) if waits else 0.0,
+            'max_wait': max(waits, default=0.0),
+        }
+
+
+class PriorityLock:
+    # Mutex that is handed to waiting threads of a more urgent class first, by the priority of the calling thread
+
+    def __init__(self):
+        self.locked = False
+        self.waiting = {priority: 0 for priority in PRIORITY_NAMES}
+        self.cond = threading.Condition()
+
+    def _blocked(self, priority):
+        return self.locked or any(self.waiting[other] for other in self.waiting if other < priority)
+
+    def __enter__(self):
+        priority = current_priority()
+        with self.cond:
+            self.waiting[priority] += 1
+            while self._blocked(priority):
+                self.cond.wait()
+            self.waiting[priority] -= 1
+            self.locked = True
+        return self
+
+    def __exit__(self, *exc_info):
+        with self.cond:
+            self.locked = False
+            self.cond.notify_all()
+
+
+limiter = RateLimiter()
@@ -0,0 +1,72 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import rate_limiter
+
+# Process-wide scheduler for periodic background jobs.
+# Each job runs on a fixed cadence and its latest successful result is kept as a
+# snapshot that every session can read without waiting on the upstream call.
+
+
+class Scheduler:
+
+    def __init__(self, max_workers=4, tick=1.0):
+        self.jobs = dict()
+        self.snapshots = dict()
+        self.running = set()
+        self.tick = tick
+        self.lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="scheduler")
+        self.thread = None
+
+    def add(self, name, func, interval):
+        with self.lock:
+            self.jobs[name] = {'func': func, 'interval': interval, 'next_run': 0.0}
+
+    def get(self, name):
+        # Latest snapshot, or None when the job has not succeeded yet
+        snapshot = self.snapshots.get(name)
+        return None if snapshot is None else snapshot['value']
+
+    def updated_at(self, name):
+        snapshot = self.snapshots.get(name)
+        return None if snapshot is None else snapshot['time']
+
+    def run_now(self, name):
+        # Run a job in the calling thread and return its result
+        value = self.jobs[name]['func']()
+        if not isinstance(value, Exception):
+            self.snapshots[name] = {'value': value, 'time': time.time()}
+        return value
+
+    def _run_job(self, name):
+        try:
+            with rate_limiter.caller(priority=rate_limiter.BACKGROUND):
+                self.run_now(name)
+        except Exception:
+            pass
+        finally:
+            with self.lock:
+                self.running.discard(name)
+
+    def _loop(self):
+        while True:
+            now = time.monotonic()
+            with self.lock:
+                for name, job in self.jobs.items():
+                    if job['next_run'] <= now and name not in self.running:
+                        job['next_run'] = now + job['interval']
+                        self.running.add(name)
+                        self.executor.submit(self._run_job, name)
+            time.sleep(self.tick)
+
+    def start(self):
+        with self.lock:
+            if self.thread is not None:
+                return
+            self.thread = threading.Thread(target=self._loop, name="scheduler", daemon=True)
+        self.thread.start()
+
+
+scheduler = Scheduler()
@@ -0,0 +1,8 @@
+from curl_cffi import requests as curl_requests
+
+# HTTP session for the Yahoo API.
+# Yahoo API calls go through yfinance, which keeps a single curl_cffi session for the
+# whole process. Passing that same session to every yf.Ticker / yf.download call keeps
+# its keep-alive connections and cookies warm (yf.download would otherwise install a new one).
+
+yahoo_session = curl_requests.Session(impersonate="chrome")
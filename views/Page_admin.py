@@ -0,0 +1,109 @@
+from functions import *
+import data_cache
+import rate_limiter
+
+st.set_page_config(
+    page_title="Cache admin", # The page title, shown in the browser tab.
+    page_icon=":material/monitoring:",
+    layout="wide", # How the page content should be laid out.
+    initial_sidebar_state="auto", # How the sidebar should start out.
+)
+
+# ---- SIDEBAR ----
+with st.sidebar:
+
+    st.subheader("Invalidate")
+
+    TICKER = st.text_input(
+        label="Ticker:",
+        placeholder="All tickers"
+    ).strip()
+
+    DATA_CLASS = st.selectbox(
+        label="Data class:",
+        options=list(data_cache.TTL),
+        index=None,
+        placeholder="All data classes"
+    )
+
+    button = st.button("Invalidate", disabled=not TICKER and DATA_CLASS is None)
+
+    if button:
+        n = data_cache.invalidate(ticker=TICKER or None, data_class=DATA_CLASS)
+        st.success(f"{n} entries dropped")
+
+    st.write("")
+    st.button("Reload")
+
+# ---- MAIN PAGE ----
+
+st.header("Cache")
+
+usage = data_cache.budget.usage()
+
+cols = st.columns(4, gap="small")
+cols[0].metric(label="Memory", value=f"{usage['bytes'] / 1024 ** 2:,.1f} MiB")
+cols[1].metric(label="Budget", value=f"{usage['max_bytes'] / 1024 ** 2:,.0f} MiB")
+cols[2].metric(label="Entries", value=f"{usage['entries']:,}")
+cols[3].metric(label="Evictions", value=f"{usage['evictions']:,}")
+
+df = pd.DataFrame(data_cache.stats())
+df['MiB'] = df.pop('bytes') / 1024 ** 2
+
+st.dataframe(
+    data=df,
+    hide_index=True,
+    column_config={
+        'hit_ratio': st.column_config.NumberColumn(format="%.2f"),
+        'mean_latency': st.column_config.NumberColumn(label="mean_latency (s)", format="%.3f"),
+        'MiB': st.column_config.NumberColumn(format="%.2f"),
+    }
+)
+
+with st.expander("Recently used keys"):
+    for function in data_cache.registry:
+        keys = function.hot_keys()
+        if keys:
+            st.write(function.__name__)
+            st.dataframe(
+                data=pd.DataFrame([{name: str(value) for name, value in key} for key in keys]),
+                hide_index=True
+            )
+
+st.header("Indicator cache")
+
+stats = indicator_cache.stats()
+lookups = stats['hits'] + stats['misses']
+
+cols = st.columns(4, gap="small")
+cols[0].metric(label="Entries", value=f"{stats['entries']:,}")
+cols[1].metric(label="Memory", value=f"{stats['bytes'] / 1024 ** 2:,.1f} MiB")
+cols[2].metric(label="Hits", value=f"{stats['hits']:,}")
+cols[3].metric(label="Hit ratio", value=f"{stats['hits'] / lookups:.2f}" if lookups else "-")
+
+st.header("Rate limiter")
+
+stats = rate_limiter.limiter.stats()
+
+cols = st.columns(4, gap="small")
+cols[0].metric(label="Queued (foreground)", value=stats['queued']['foreground'])
+cols[1].metric(label="Queued (background)", value=stats['queued']['background'])
+cols[2].metric(label="Mean wait", value=f"{stats['mean_wait']:.2f} s")
+cols[3].metric(label="Max wait", value=f"{stats['max_wait']:.2f} s")
+
+st.header("Portfolio warm-up")
+
+progress = dict(warmup_progress)
+
+if progress['started_at'] is None:
+    st.write("Not started yet")
+else:
+    st.progress(
+        value=progress['done'] / progress['total'] if progress['total'] else 1.0,
+        text=f"{progress['done']} / {progress['total']} fetches, {progress['errors']} errors"
+    )
+    started = datetime.datetime.fromtimestamp(progress['started_at']).replace(microsecond=0)
+    if progress['finished_at'] is None:
+        st.write("Running since:", started)
+    else:
+        st.write("Last run:", started, f"({progress['finished_at'] - progress['started_at']:.1f} s)")
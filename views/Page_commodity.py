@@ -116,21 +116,33 @@ with st.sidebar:
         options=indicator_list
     )
 
+    SLIDER_INDICATORS = list()
     if 'SMA_X' in INDICATORS or 'EMA_X' in INDICATORS:
         TIME_SPAN = st.slider(
             label="Select time span:",
-            min_value=10,  # The minimum permitted value.
-            max_value=200,  # The maximum permitted value.
+            min_value=SLIDER_WINDOWS.start,  # The minimum permitted value.
+            max_value=SLIDER_WINDOWS.stop - 1,  # The maximum permitted value.
             value=30  # The value of the slider when it first renders.
         )
-        INDICATORS = [indicator.replace("X", str(TIME_SPAN)) if '_X' in indicator else indicator for indicator in INDICATORS]
+        SLIDER_INDICATORS = [indicator.replace("X", str(TIME_SPAN)) for indicator in INDICATORS if '_X' in indicator]
+        # SMA_X at 20 is the same column as SMA_20
+        INDICATORS = remove_duplicates([indicator.replace("X", str(TIME_SPAN)) if '_X' in indicator else indicator for indicator in INDICATORS])
+
+    crossover_list = crossover_options(INDICATORS)
+
+    CROSSOVERS = list()
+    if len(crossover_list) > 0:
+        CROSSOVERS = st.multiselect(
+            label="Crossover signals:",
+            options=crossover_list,
+            format_func=lambda name: name.partition("_")[2].replace("/", " / ")
+        )
 
     st.write("")
     button = st.button("Refresh data")
 
     if button:
         st.session_state['current_time_commodity_page'] = datetime.datetime.now(st.session_state['timezone']).replace(microsecond=0, tzinfo=None)
-        fetch_table.clear()
         fetch_info.clear()
         fetch_history.clear()
         # st.cache_data.clear()
@@ -162,31 +174,27 @@ st.title("Commodity Market")
 
 
 
-URL = "https://finance.yahoo.com/markets/commodities/"
-
-df = fetch_table(URL)
-
-COMMODITIES = ["GC=F", "SI=F", "HG=F", "NG=F", "BZ=F", "KC=F", "KE=F", "ZS=F"]
+df = get_overview("commodities")
 
 st.subheader("Top Commodities")
 if isinstance(df, Exception):
     st.error(df)
-    fetch_table.clear(URL)
 else:
     with st.container(border=True):
         i = 0
         for _ in range(2):
             cols = st.columns(4, gap="small")
             for col in cols:
+                if i >= len(df):
+                    break
                 with col:
-                    row = df[df['Symbol'] == COMMODITIES[i]].iloc[0]
+                    row = df.iloc[i]
                     name = row['Name']
                     symbol = row['Symbol']
-                    price, change, change_pt = row['Price'].split()
                     st.metric(
                         label=f'{name}',
-                        value=f'{price}',
-                        delta=f'{change} {change_pt}'
+                        value=f"{row['Price']:,.2f}",
+                        delta=f"{row['Change']:+,.2f} ({row['Change %']:+.2f}%)"
                     )
                 i += 1
 
@@ -212,48 +220,8 @@ else:
     df['ΔVolume%'] = df['Volume'].pct_change(periods=1) * 100
     df['ΔVolume%'] = df['ΔVolume%'].apply(lambda x: f"{x:.1f}%" if pd.notna(x) else None)
 
-for INDICATOR in INDICATORS:
-    if "SMA" in INDICATOR:
-        window = int(INDICATOR.split("_")[1])
-        df[INDICATOR] = df['Close'].rolling(window=window, min_periods=1).mean()
-    if "EMA" in INDICATOR:
-        window = int(INDICATOR.split("_")[1])
-        df[INDICATOR] = df['Close'].ewm(span=window, adjust=False, min_periods=1).mean()
-
-if "ATR" in INDICATORS:
-
-    Prev_Close = df['Close'].shift(1)
-    High_Low = df['High'] - df['Low']
-    High_PrevClose = abs(df['High'] - Prev_Close)
-    Low_PrevClose = abs(df['Low'] - Prev_Close)
-
-    df['TR'] = pd.concat([High_Low, High_PrevClose, Low_PrevClose], axis=1).max(axis=1)
-
-    df['ATR'] = df['TR'].rolling(window=14, min_periods=1).mean()
-
-    df = df.drop(columns=['TR'], axis=1)
-
-if "MACD" in INDICATORS:
-
-    ema_short = df['Close'].ewm(span=12, adjust=False, min_periods=1).mean()
-    ema_long = df['Close'].ewm(span=26, adjust=False, min_periods=1).mean()
-    df['MACD'] = ema_short - ema_long
-    df['Signal'] = df['MACD'].ewm(span=9, adjust=False, min_periods=1).mean()
-    df['MACD_Hist'] = df['MACD'] - df['Signal']
-
-if "RSI" in INDICATORS:
-
-    # delta = df['Close'].diff()
-    delta = df['Close'].pct_change(periods=1) * 100
-
-    # Separate gains and losses
-    gain = (delta.where(delta > 0, 0)).rolling(window=14, min_periods=1).mean()
-    loss = (-delta.where(delta < 0, 0)).rolling(window=14, min_periods=1).mean()
-
-    # Calculate the relative strength (RS)
-    rs = gain / loss
-
-    df['RSI'] = 100 - (100 / (1 + rs))
+df = chart_indicators(df, INDICATORS, COMMODITY, PERIOD, INTERVAL, SLIDER_INDICATORS)
+df = join(df, crossovers(df, CROSSOVERS))
 
 fig = plot_candles_stick_bar(df, "Candlestick Chart")
 
@@ -72,8 +72,7 @@ with st.sidebar:
         TICKERS = TICKERS[:10]
 
     _tickers = list()
-    for TICKER in TICKERS:
-        info = fetch_info(TICKER)
+    for TICKER, info in zip(TICKERS, fetch_info_multiple(TICKERS)):
         if isinstance(info, Exception):
             st.error(info)
             fetch_info.clear(TICKER)
@@ -98,9 +97,7 @@ with st.sidebar:
     if button:
         st.session_state['current_time_financials_page'] = datetime.datetime.now(st.session_state['timezone']).replace(microsecond=0, tzinfo=None)
         fetch_info.clear()
-        fetch_balance.clear()
-        fetch_income.clear()
-        fetch_cash.clear()
+        fetch_fundamentals.clear()
         #st.cache_data.clear()
 
     st.write("Last update:", st.session_state['current_time_financials_page'])
@@ -151,7 +148,7 @@ if len(TICKERS) == 1:
 
     if isinstance(bs, Exception):
         st.error(bs)
-        fetch_balance.clear(TICKER, tp=TIME_PERIOD)
+        fetch_fundamentals.clear(TICKER)
         st.stop()
 
     fig = plot_capital(bs, ticker=TICKER, currency=CURRENCY)
@@ -208,7 +205,7 @@ if len(TICKERS) == 1:
 
     if isinstance(ist, Exception):
         st.error(ist)
-        fetch_income.clear(TICKER, tp=TIME_PERIOD)
+        fetch_fundamentals.clear(TICKER)
         st.stop()
 
     fig = plot_income(ist, ticker=TICKER, currency=CURRENCY)
@@ -280,7 +277,7 @@ if len(TICKERS) == 1:
 
     if isinstance(cf, Exception):
         st.error(cf)
-        fetch_cash.clear(TICKER, tp=TIME_PERIOD)
+        fetch_fundamentals.clear(TICKER)
         st.stop()
 
     fig = plot_cash(cf, ticker=TICKER, currency=CURRENCY)
@@ -138,32 +138,43 @@ with st.sidebar:
         placeholder="Select interval...",
     )
 
-    if len(CURRENCY_1) == 1:
+    indicator_list = ['SMA_20', 'SMA_50', 'SMA_200', 'SMA_X', 'EMA_20', 'EMA_50', 'EMA_200', 'EMA_X', 'ATR', 'MACD', 'RSI']
 
-        indicator_list = ['SMA_20', 'SMA_50', 'SMA_200', 'SMA_X', 'EMA_20', 'EMA_50', 'EMA_200', 'EMA_X', 'ATR', 'MACD', 'RSI']
+    INDICATORS = st.multiselect(
+        label="Technical indicators:",
+        options=indicator_list
+    )
 
-        INDICATORS = st.multiselect(
-            label="Technical indicators:",
-            options=indicator_list
+    SLIDER_INDICATORS = list()
+    if 'SMA_X' in INDICATORS or 'EMA_X' in INDICATORS:
+        TIME_SPAN = st.slider(
+            label="Select time span:",
+            min_value=SLIDER_WINDOWS.start,  # The minimum permitted value.
+            max_value=SLIDER_WINDOWS.stop - 1,  # The maximum permitted value.
+            value=30  # The value of the slider when it first renders.
+        )
+        SLIDER_INDICATORS = [indicator.replace("X", str(TIME_SPAN)) for indicator in INDICATORS if '_X' in indicator]
+        # SMA_X at 20 is the same column as SMA_20
+        INDICATORS = remove_duplicates([indicator.replace("X", str(TIME_SPAN)) if '_X' in indicator else indicator for indicator in INDICATORS])
+
+    crossover_list = crossover_options(INDICATORS)
+
+    CROSSOVERS = list()
+    if len(CURRENCY_1) == 1 and len(crossover_list) > 0: # only the single-symbol chart shows them
+        CROSSOVERS = st.multiselect(
+            label="Crossover signals:",
+            options=crossover_list,
+            format_func=lambda name: name.partition("_")[2].replace("/", " / ")
         )
-
-        if 'SMA_X' in INDICATORS or 'EMA_X' in INDICATORS:
-            TIME_SPAN = st.slider(
-                label="Select time span:",
-                min_value=10,  # The minimum permitted value.
-                max_value=200,  # The maximum permitted value.
-                value=30  # The value of the slider when it first renders.
-            )
-            INDICATORS = [indicator.replace("X", str(TIME_SPAN)) if '_X' in indicator else indicator for indicator in INDICATORS]
 
     st.write("")
     button = st.button("Refresh data")
 
     if button:
         st.session_state['current_time_forex_page'] = datetime.datetime.now(st.session_state['timezone']).replace(microsecond=0, tzinfo=None)
-        fetch_table.clear()
         fetch_info.clear()
         fetch_history.clear()
+        fetch_history_multiple.clear()
         # st.cache_data.clear()
 
     st.write("Last update:", st.session_state['current_time_forex_page'])
@@ -195,60 +206,53 @@ col1, col2 = st.columns(2, gap="small")
 
 with col1:
 
-    URL = "https://finance.yahoo.com/markets/currencies/"
-
-    CURRENCIES = ["EURUSD=X", "JPY=X", "GBPUSD=X", "AUDUSD=X", "CNY=X", "MXN=X", "INR=X", "SGD=X", "ZAR=X"]
-
-    df = fetch_table(URL)
+    df = get_overview("currencies")
 
     st.subheader("Top Currencies")
     if isinstance(df, Exception):
         st.error(df)
-        fetch_table.clear(URL)
     else:
         with st.container(border=True):
             i = 0
             for _ in range(2):
                 cols = st.columns(3, gap="small")
                 for col in cols:
+                    if i >= len(df):
+                        break
                     with col:
-                        #row = df.iloc[i]
-                        row = df[df['Symbol'] == CURRENCIES[i]].iloc[0]
+                        row = df.iloc[i]
                         name = row['Name']
                         symbol = row['Symbol']
-                        price, change, change_pt = row['Price'].split()
                         st.metric(
                             label=f'{name}',
-                            value=f'{price}',
-                            delta=f'{change} {change_pt}'
+                            value=f"{row['Price']:,.4f}",
+                            delta=f"{row['Change']:+,.4f} ({row['Change %']:+.2f}%)"
                         )
                     i += 1
 
 with col2:
 
-    URL = "https://finance.yahoo.com/markets/crypto/all/"
-
-    df = fetch_table(URL)
+    df = get_overview("cryptos")
 
     st.subheader("Top Cryptos")
     if isinstance(df, Exception):
         st.error(df)
-        fetch_table.clear(URL)
     else:
         with st.container(border=True):
             i = 0
             for _ in range(2):
                 cols = st.columns(3, gap="small")
                 for col in cols:
+                    if i >= len(df):
+                        break
                     with col:
                         row = df.iloc[i]
                         name = row['Name']
                         symbol = row['Symbol']
-                        price, change, change_pt = row['Price'].split()
                         st.metric(
                             label=f'{name}',
-                            value=f'{price}',
-                            delta=f'{change} {change_pt}'
+                            value=f"{row['Price']:,.2f}",
+                            delta=f"{row['Change']:+,.2f} ({row['Change %']:+.2f}%)"
                         )
                     i += 1
 
@@ -305,48 +309,8 @@ if len(CURRENCY_1) == 1:
     df = hist.copy()
     df = df.drop(columns=['Volume'], axis=1)
 
-    for INDICATOR in INDICATORS:
-        if "SMA" in INDICATOR:
-            window = int(INDICATOR.split("_")[1])
-            df[INDICATOR] = df['Close'].rolling(window=window, min_periods=1).mean()
-        if "EMA" in INDICATOR:
-            window = int(INDICATOR.split("_")[1])
-            df[INDICATOR] = df['Close'].ewm(span=window, adjust=False, min_periods=1).mean()
-
-    if "ATR" in INDICATORS:
-
-        Prev_Close = df['Close'].shift(1)
-        High_Low = df['High'] - df['Low']
-        High_PrevClose = abs(df['High'] - Prev_Close)
-        Low_PrevClose = abs(df['Low'] - Prev_Close)
-
-        df['TR'] = pd.concat([High_Low, High_PrevClose, Low_PrevClose], axis=1).max(axis=1)
-
-        df['ATR'] = df['TR'].rolling(window=14, min_periods=1).mean()
-
-        df = df.drop(columns=['TR'], axis=1)
-
-    if "MACD" in INDICATORS:
-
-        ema_short = df['Close'].ewm(span=12, adjust=False, min_periods=1).mean()
-        ema_long = df['Close'].ewm(span=26, adjust=False, min_periods=1).mean()
-        df['MACD'] = ema_short - ema_long
-        df['Signal'] = df['MACD'].ewm(span=9, adjust=False, min_periods=1).mean()
-        df['MACD_Hist'] = df['MACD'] - df['Signal']
-
-    if "RSI" in INDICATORS:
-
-        # delta = df['Close'].diff()
-        delta = df['Close'].pct_change(periods=1) * 100
-
-        # Separate gains and losses
-        gain = (delta.where(delta > 0, 0)).rolling(window=14, min_periods=1).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=14, min_periods=1).mean()
-
-        # Calculate the relative strength (RS)
-        rs = gain / loss
-
-        df['RSI'] = 100 - (100 / (1 + rs))
+    df = chart_indicators(df, INDICATORS, TICKER, PERIOD, INTERVAL, SLIDER_INDICATORS)
+    df = join(df, crossovers(df, CROSSOVERS))
 
     fig = plot_candles_stick_bar(df, "Candlestick Chart")
 
@@ -368,27 +332,23 @@ else:
         else:
             TICKERS.append(f'{currency}{CURRENCY_2}=X')
 
-    dfs_hist = list()
-    for TICKER in TICKERS:
-
-        hist = fetch_history(TICKER, period=PERIOD, interval=INTERVAL)
+    panel = fetch_history_multiple(TICKERS, period=PERIOD, interval=INTERVAL)
 
-        if isinstance(hist, Exception):
-            st.error(hist)
-            fetch_history.clear(TICKER, period=PERIOD, interval=INTERVAL)
-
-        else:
-            hist.insert(0, 'Ticker', TICKER[:3])
+    if isinstance(panel, Exception):
+        st.error(panel)
+        fetch_history_multiple.clear(TICKERS, period=PERIOD, interval=INTERVAL)
+        st.stop()
 
-            hist['Pct_change'] = ((hist['Close'] - hist['Close'].iloc[0]) / hist['Close'].iloc[0])
+    for TICKER in TICKERS:
 
-            dfs_hist.append(hist)
+        if TICKER not in panel.columns.get_level_values(0):
+            st.error(f"{TICKER}: no price data found")
 
-        if len(dfs_hist) == 0:
-            st.error("Error found")
-            st.stop()
+    df = compact_panel(panel, TICKERS, labels=[TICKER[:3] for TICKER in TICKERS])
 
-    df = pd.concat(dfs_hist, ignore_index=False)
+    if df.empty:
+        st.error("Error found")
+        st.stop()
 
     # ----LINE CHART----
 
@@ -396,6 +356,25 @@ else:
 
     st.plotly_chart(fig, use_container_width=True)
 
+    # ----INDICATORS----
+
+    if len(INDICATORS) > 0:
+
+        df = join(df, compute_panel(df, INDICATORS))
+
+        st.subheader("Technical indicators")
+
+        st.dataframe(
+            data=indicator_summary(df),
+            hide_index=True
+        )
+
+        for INDICATOR in indicator_columns(INDICATORS):
+            if INDICATOR in ['Signal', 'MACD_Hist']:
+                continue
+            fig = plot_indicator_multiple(df, INDICATOR, INDICATOR)
+            st.plotly_chart(fig, use_container_width=True)
+
 with st.expander("Show data"):
     st.dataframe(
         data=df.reset_index(),
@@ -74,24 +74,6 @@ with st.sidebar:
         st.session_state['dark_mode'] = TOGGLE_THEME
         st.rerun()
 
-    PORTFOLIOS = {
-        "Magnificent 7": "MSFT, GOOGL, AAPL, AMZN, META, TSLA, NVDA",
-        "Top 5 Shanghai": "600519.SS, 601398.SS, 600036.SS, 601318.SS, 601857.SS",
-        "Top 5 Tokyo": "7203.T, 6758.T, 8306.T, 6861.T, 7974.T",
-        "Top 5 Hong Kong": "0700.HK, 9988.HK, 1299.HK, 3690.HK, 0939.HK",
-        "Top 5 Euronext": "ASML.AS, MC.PA, OR.PA, RMS.PA, TTE.PA",
-        "Top 5 London": "AZN.L, HSBA.L, SHEL.L, ULVR.L, DGE.L",
-        "Top 5 Bombay": "RELIANCE.NS, TCS.NS, HDFCBANK.NS, INFY.NS, ICICIBANK.NS",
-        "Top 5 Toronto": "RY.TO, TD.TO, CNR.TO, ENB.TO, SHOP.TO",
-        "Top 5 Frankfurt": "SAP.DE, SIE.DE, VOW3.DE, ALV.DE, DTE.DE",
-        "Top 5 Australia": "BHP.AX, CBA.AX, CSL.AX, NAB.AX, WBC.AX",
-        "Top 5 Singapore": "D05.SI, O39.SI, U11.SI, Z74.SI, 9CI.SI",
-        "Top 5 São Paulo": "VALE3.SA, PETR4.SA, BBDC4.SA, ABEV3.SA, BBAS3.SA",
-        "Top 5 Buenos Aires": "YPFD.BA, GGAL.BA, BMA.BA, BBAR.BA, PAMP.BA",
-        "Oil&Gas": "CVX, XOM, SHEL, YPFD.BA, VIST, PAMP.BA",
-        "Vehicles": "TSLA, F, GM, VOW3.DE, 7203.T, 1211.HK, RACE",
-    }
-
     PORTFOLIO = st.selectbox(
         label="Portfolios",
         options=[None] + list(PORTFOLIOS.keys()),
@@ -119,8 +101,7 @@ with st.sidebar:
         TICKERS = TICKERS[:10]
 
     _tickers = list()
-    for TICKER in TICKERS:
-        info = fetch_info(TICKER)
+    for TICKER, info in zip(TICKERS, fetch_info_multiple(TICKERS)):
         if isinstance(info, Exception):
             st.error(info)
             fetch_info.clear(TICKER)
@@ -162,30 +143,43 @@ with st.sidebar:
             value=True
         )
 
-        indicator_list = ['SMA_20', 'SMA_50', 'SMA_200', 'SMA_X', 'EMA_20', 'EMA_50', 'EMA_200', 'EMA_X', 'ATR', 'MACD', 'RSI']
+    indicator_list = ['SMA_20', 'SMA_50', 'SMA_200', 'SMA_X', 'EMA_20', 'EMA_50', 'EMA_200', 'EMA_X', 'ATR', 'MACD', 'RSI']
 
-        INDICATORS = st.multiselect(
-            label="Technical indicators:",
-            options=indicator_list
-        )
+    INDICATORS = st.multiselect(
+        label="Technical indicators:",
+        options=indicator_list
+    )
 
-        if 'SMA_X' in INDICATORS or 'EMA_X' in INDICATORS:
-            TIME_SPAN = st.slider(
-                label="Select time span:",
-                min_value=10,  # The minimum permitted value.
-                max_value=200,  # The maximum permitted value.
-                value=30  # The value of the slider when it first renders.
-            )
-            INDICATORS = [indicator.replace("X", str(TIME_SPAN)) if '_X' in indicator else indicator for indicator in INDICATORS]
+    SLIDER_INDICATORS = list()
+    if 'SMA_X' in INDICATORS or 'EMA_X' in INDICATORS:
+        TIME_SPAN = st.slider(
+            label="Select time span:",
+            min_value=SLIDER_WINDOWS.start,  # The minimum permitted value.
+            max_value=SLIDER_WINDOWS.stop - 1,  # The maximum permitted value.
+            value=30  # The value of the slider when it first renders.
+        )
+        SLIDER_INDICATORS = [indicator.replace("X", str(TIME_SPAN)) for indicator in INDICATORS if '_X' in indicator]
+        # SMA_X at 20 is the same column as SMA_20
+        INDICATORS = remove_duplicates([indicator.replace("X", str(TIME_SPAN)) if '_X' in indicator else indicator for indicator in INDICATORS])
+
+    crossover_list = crossover_options(INDICATORS)
+
+    CROSSOVERS = list()
+    if len(TICKERS) == 1 and len(crossover_list) > 0: # only the single-symbol chart shows them
+        CROSSOVERS = st.multiselect(
+            label="Crossover signals:",
+            options=crossover_list,
+            format_func=lambda name: name.partition("_")[2].replace("/", " / ")
+        )
 
     st.write("")
     button = st.button("Refresh data")
 
     if button:
         st.session_state['current_time_price_page'] = datetime.datetime.now(st.session_state['timezone']).replace(microsecond=0, tzinfo=None)
-        fetch_table.clear()
         fetch_info.clear()
         fetch_history.clear()
+        fetch_history_multiple.clear()
         #st.cache_data.clear()
 
     st.write("Last update:", st.session_state['current_time_price_page'])
@@ -225,87 +219,79 @@ col1, col2, col3 = st.columns(3, gap="small")
 
 with col1:
 
-    URL = "https://finance.yahoo.com/markets/world-indices/"
-
-    df = fetch_table(URL)
-
-    INDICES = ["^GSPC", "^DJI", "^IXIC", "^N225", "^GDAXI", "^MERV"]
+    df = get_overview("indices")
 
     st.subheader("Indices")
     if isinstance(df, Exception):
         st.error(df)
-        fetch_table.clear(URL)
     if isinstance(df, pd.DataFrame):
         with st.container(border=True):
             i = 0
             for _ in range(3):
                 cols = st.columns(2, gap="small")
                 for col in cols:
+                    if i >= len(df):
+                        break
                     with col:
-                        row = df[df['Symbol'] == INDICES[i]].iloc[0]
+                        row = df.iloc[i]
                         name = row['Name']
                         symbol = row['Symbol']
-                        price, change, change_pt = row['Price'].split()
                         st.metric(
                             label=f'{name} ({symbol})',
-                            value=f'{price}',
-                            delta=f'{change} {change_pt}'
+                            value=f"{row['Price']:,.2f}",
+                            delta=f"{row['Change']:+,.2f} ({row['Change %']:+.2f}%)"
                         )
                     i += 1
 
 with col2:
 
-    URL = "https://finance.yahoo.com/markets/stocks/gainers/"
-
-    df = fetch_table(URL)
+    df = get_overview("gainers")
 
     st.subheader("Top Gainers")
     if isinstance(df, Exception):
         st.error(df)
-        fetch_table.clear(URL)
     if isinstance(df, pd.DataFrame):
         with st.container(border=True):
             i = 0
             for _ in range(3):
                 cols = st.columns(2, gap="small")
                 for col in cols:
+                    if i >= len(df):
+                        break
                     with col:
                         row = df.iloc[i]
                         name = row['Name']
                         symbol = row['Symbol']
-                        price, change, change_pt = row['Price'].split()
                         st.metric(
                             label=f'{name} ({symbol})',
-                            value=f'{price}',
-                            delta=f'{change} {change_pt}'
+                            value=f"{row['Price']:,.2f}",
+                            delta=f"{row['Change']:+,.2f} ({row['Change %']:+.2f}%)"
                         )
                     i += 1
 
 with col3:
 
-    URL = "https://finance.yahoo.com/markets/stocks/losers/"
-
-    df = fetch_table(URL)
+    df = get_overview("losers")
 
     st.subheader("Top Losers")
     if isinstance(df, Exception):
         st.error(df)
-        fetch_table.clear(URL)
     if isinstance(df, pd.DataFrame):
         with st.container(border=True):
             i = 0
             for _ in range(3):
                 cols = st.columns(2, gap="small")
                 for col in cols:
+                    if i >= len(df):
+                        break
                     with col:
                         row = df.iloc[i]
                         name = row['Name']
                         symbol = row['Symbol']
-                        price, change, change_pt = row['Price'].split()
                         st.metric(
                             label=f'{name} ({symbol})',
-                            value=f'{price}',
-                            delta=f'{change} {change_pt}'
+                            value=f"{row['Price']:,.2f}",
+                            delta=f"{row['Change']:+,.2f} ({row['Change %']:+.2f}%)"
                         )
                     i += 1
 
@@ -342,8 +328,17 @@ if len(TICKERS) == 1:
                 hide_index=True
             )
         with col2:
-            BUSINESS_SUMMARY = info.get('longBusinessSummary', "")
-            st.write(BUSINESS_SUMMARY)
+            # An expander runs its body on every rerun, the summary is only fetched once asked for
+            TOGGLE_SUMMARY = st.toggle(
+                label="Business summary",
+                value=False
+            )
+            if TOGGLE_SUMMARY:
+                BUSINESS_SUMMARY = fetch_business_summary(TICKER)
+                if isinstance(BUSINESS_SUMMARY, Exception):
+                    st.error(BUSINESS_SUMMARY)
+                else:
+                    st.write(BUSINESS_SUMMARY)
 
     #----METRICS----
     PREVIOUS_PRICE = info.get('previousClose', 0)
@@ -428,48 +423,8 @@ if len(TICKERS) == 1:
         df['ΔVolume%'] = df['Volume'].pct_change(periods=1) * 100
         df['ΔVolume%'] = df['ΔVolume%'].apply(lambda x: f"{x:.1f}%" if pd.notna(x) else None)
 
-    for INDICATOR in INDICATORS:
-        if "SMA" in INDICATOR:
-            window = int(INDICATOR.split("_")[1])
-            df[INDICATOR] = df['Close'].rolling(window=window, min_periods=1).mean()
-        if "EMA" in INDICATOR:
-            window = int(INDICATOR.split("_")[1])
-            df[INDICATOR] = df['Close'].ewm(span=window, adjust=False, min_periods=1).mean()
-
-    if "ATR" in INDICATORS:
-
-        Prev_Close = df['Close'].shift(1)
-        High_Low = df['High'] - df['Low']
-        High_PrevClose = abs(df['High'] - Prev_Close)
-        Low_PrevClose = abs(df['Low'] - Prev_Close)
-
-        df['TR'] = pd.concat([High_Low, High_PrevClose, Low_PrevClose], axis=1).max(axis=1)
-
-        df['ATR'] = df['TR'].rolling(window=14, min_periods=1).mean()
-
-        df = df.drop(columns=['TR'], axis=1)
-
-    if "MACD" in INDICATORS:
-
-        ema_short = df['Close'].ewm(span=12, adjust=False, min_periods=1).mean()
-        ema_long = df['Close'].ewm(span=26, adjust=False, min_periods=1).mean()
-        df['MACD'] = ema_short - ema_long
-        df['Signal'] = df['MACD'].ewm(span=9, adjust=False, min_periods=1).mean()
-        df['MACD_Hist'] = df['MACD'] - df['Signal']
-
-    if "RSI" in INDICATORS:
-
-        # delta = df['Close'].diff()
-        delta = df['Close'].pct_change(periods=1) * 100
-
-        # Separate gains and losses
-        gain = (delta.where(delta > 0, 0)).rolling(window=14, min_periods=1).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=14, min_periods=1).mean()
-
-        # Calculate the relative strength (RS)
-        rs = gain / loss
-
-        df['RSI'] = 100 - (100 / (1 + rs))
+    df = chart_indicators(df, INDICATORS, TICKER, PERIOD, INTERVAL, SLIDER_INDICATORS)
+    df = join(df, crossovers(df, CROSSOVERS))
 
     fig = plot_candles_stick_bar(df, title="Candlestick Chart", currency=CURRENCY)
 
@@ -490,9 +445,15 @@ else:
 
     st.header(f"Securities: {TITLE}")
 
-    dfs_hist = list()
     dfs_info = list()
 
+    panel = fetch_history_multiple(TICKERS, period=PERIOD, interval=INTERVAL)
+
+    if isinstance(panel, Exception):
+        st.error(panel)
+        fetch_history_multiple.clear(TICKERS, period=PERIOD, interval=INTERVAL)
+        st.stop()
+
     for TICKER in TICKERS:
         info = fetch_info(TICKER)
 
@@ -500,22 +461,14 @@ else:
         df = df.rename(columns={0: TICKER})
         dfs_info.append(df)
 
-        hist = fetch_history(TICKER, period=PERIOD, interval=INTERVAL)
-
-        if isinstance(hist, Exception):
-            st.error(hist)
-            fetch_history.clear(TICKER, period=PERIOD, interval=INTERVAL)
-
-        else:
-            hist.insert(0, 'Ticker', TICKER)
-
-            hist['Pct_change'] = ((hist['Close'] - hist['Close'].iloc[0]) / hist['Close'].iloc[0])
+        if TICKER not in panel.columns.get_level_values(0):
+            st.error(f"{TICKER}: no price data found")
 
-            dfs_hist.append(hist)
+    hist = compact_panel(panel, TICKERS)
 
-        if len(dfs_hist) == 0:
-            st.error("Error found")
-            st.stop()
+    if hist.empty:
+        st.error("Error found")
+        st.stop()
 
     df = pd.concat(dfs_info, axis=1, join='inner')
     df = df.reset_index()
@@ -531,7 +484,7 @@ else:
 
     # ----PERFORMANCES----
 
-    df = pd.concat(dfs_hist, ignore_index=False)
+    df = hist
 
     fig = performance_table(df, TICKERS)
 
@@ -543,6 +496,25 @@ else:
 
     st.plotly_chart(fig, use_container_width=True)
 
+    # ----INDICATORS----
+
+    if len(INDICATORS) > 0:
+
+        df = join(df, compute_panel(df, INDICATORS))
+
+        st.subheader("Technical indicators")
+
+        st.dataframe(
+            data=indicator_summary(df),
+            hide_index=True
+        )
+
+        for INDICATOR in indicator_columns(INDICATORS):
+            if INDICATOR in ['Signal', 'MACD_Hist']:
+                continue
+            fig = plot_indicator_multiple(df, INDICATOR, INDICATOR)
+            st.plotly_chart(fig, use_container_width=True)
+
     with st.expander("Show data"):
         st.dataframe(
             data=df.reset_index(),